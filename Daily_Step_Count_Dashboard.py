@@ -1,51 +1,128 @@
-import pandas as pd
-import plotly.graph_objects as go
-from plotly.subplots import make_subplots
+import functools
+import os
+
 import streamlit as st
-from datetime import timedelta
-import calendar as cal
+
+from step_dashboard.calendar_grid import MONTH_NAMES, calendar_grid, weeks_in_month
+from step_dashboard.cohort import compare_cohort, comparison_table, percentile_rank
+from step_dashboard.figures import (
+    calendar_figure, cohort_goal_figure, day_of_week_figure, hourly_profile_figure, location_figure, temperature_figure,
+    timeline_figure, what_if_figure
+)
+from step_dashboard.incremental import DropDirectory, LiveDataset, WatchedFile
+from step_dashboard.instrument import MetricsRegistry, RunProbe
+from step_dashboard.intraday import IntradayStore
+from step_dashboard.partitions import PartitionedStore, WatchedPartitions
+from step_dashboard.sqlstore import SqlDataset, SqlStore
+from step_dashboard.ingest import SOURCE_PATH
+from step_dashboard.report import load_dataset
+from step_dashboard.whatif import GOAL_SWEEP, candidate_goals
 
 # Page config
 st.set_page_config(page_title="Step Count Dashboard", layout="wide")
 
-# Load data
-@st.cache_data
-def load_data():
-    df = pd.read_excel('personal_dataset.xlsx')
-    df['Date'] = pd.to_datetime(df['Date'])
-    df = df.sort_values('Date')
-    
-    
-    def extract_avg_temp(temp_str):
-        temps = temp_str.replace('ºC', '').split('-')
-        min_temp = int(temps[0])
-        max_temp = int(temps[1])
-        return (min_temp + max_temp) / 2
-    
-    df['Avg_Temp'] = df['Temperature'].apply(extract_avg_temp)
-    
-
-    bins = [0, 10, 15, 20, 25, 30, 35, 100]
-    labels = ['<10°C', '10-15°C', '15-20°C', '20-25°C', '25-30°C', '30-35°C', '35+°C']
-    df['Temp_Bin'] = pd.cut(df['Avg_Temp'], bins=bins, labels=labels, right=False)
-    
-
-    df['Day_Type'] = df['Day of week'].apply(lambda x: 'Weekend' if x in ['Saturday', 'Sunday'] else 'Weekday')
-    
-    return df
-
-df = load_data()
+# Per-user monthly Parquet partitions (see step_dashboard/partitions.py).
+# Without STEP_DATA_ROOT the dashboard reads the single personal workbook.
+DATA_ROOT = os.environ.get('STEP_DATA_ROOT')
+# New daily CSV/JSON records dropped here are appended to the workbook data
+DROP_DIR = os.environ.get('STEP_DROP_DIR')
+# How often the workbook and drop directory are checked, on a background thread
+REFRESH_SECONDS = float(os.environ.get('STEP_REFRESH_SECONDS', 5))
+# Datasets held in memory at once (one per walker and loaded month range)
+DATASET_CACHE_ENTRIES = int(os.environ.get('STEP_DATASET_CACHE_ENTRIES', 32))
+# Minute-level samples for the workbook data (see step_dashboard/intraday.py);
+# their daily totals replace the workbook's step counts
+INTRADAY_DIR = os.environ.get('STEP_INTRADAY_DIR')
+# A SQLite step database (see step_dashboard/sqlstore.py); takes precedence over
+# STEP_DATA_ROOT. Filters and aggregates run in SQL instead of in memory.
+SQL_PATH = os.environ.get('STEP_SQL_PATH')
+# Stage timings: a developer sidebar (also ?dev=1) and a Prometheus textfile
+DEV_PANEL = bool(os.environ.get('STEP_DEV_PANEL'))
+METRICS_FILE = os.environ.get('STEP_METRICS_FILE')
+
+@st.cache_resource
+def get_store():
+    if SQL_PATH:
+        return SqlStore(SQL_PATH)
+    return PartitionedStore(DATA_ROOT)
+
+@st.cache_resource
+def get_metrics():
+    return MetricsRegistry(METRICS_FILE)
+
+@st.cache_resource
+def get_intraday():
+    return IntradayStore(INTRADAY_DIR)
+
+# Load data: built once per process and dataset, and shared by every session.
+# One entry per walker and loaded month range; the least recently used are
+# evicted beyond DATASET_CACHE_ENTRIES, which also stops their refresh thread.
+@st.cache_resource(max_entries=DATASET_CACHE_ENTRIES)
+def get_dataset(user=None, months=None):
+    if SQL_PATH:
+        # Rebuilt on the refresh thread when the database file changes
+        load = lambda: SqlDataset(get_store(), user)
+        return LiveDataset(load(), reload=WatchedFile(SQL_PATH, load)).start(REFRESH_SECONDS)
+    if user is not None:
+        store = get_store()
+        load = lambda: load_dataset(user, months, store)
+        return LiveDataset(load(), reload=WatchedPartitions(store, user, months, load)).start(REFRESH_SECONDS)
+    # With minute-level data the daily step counts come from its rollup
+    load = lambda: load_dataset(intraday=get_intraday() if INTRADAY_DIR else None)
+    live = LiveDataset(load(), reload=WatchedFile(SOURCE_PATH, load))
+    if DROP_DIR:
+        live.watch(DropDirectory(DROP_DIR))
+    return live.start(REFRESH_SECONDS)
+
+# Every walker's KPIs for one filter combination, recomputed at most every 10 minutes
+@st.cache_data(ttl=600)
+def team_comparison(filters, goal):
+    return compare_cohort(DATA_ROOT, get_store().users(), filters, goal)
+
+def date_bounds(user=None):
+    if user is None:
+        # Passed as get_dataset(user, months) passes them, so both share one cache entry
+        full_df = get_dataset(None, None).refresh().df
+        return full_df['Date'].min(), full_df['Date'].max()
+    return get_store().date_bounds(user)
+
+def section(name):
+    """Run a dashboard section as a fragment, so its own widgets rerun only that section.
+
+    During a full run the section's stages are timed on the run's probe.
+    When it reruns alone it gets a fresh probe, logged with ``fragment=name``.
+    """
+    def decorate(body):
+        @st.fragment
+        @functools.wraps(body)
+        def run(run_probe, *args):
+            probe = run_probe.for_fragment(name)
+            body(probe, *args)
+            if probe is not run_probe:
+                get_metrics().finish(probe)
+        return run
+    return decorate
 
 # Constants
 GOAL = 11000
-GREEN = '#59cd90'
-RED = '#ee6055'
-AMBER = '#fac05e'
-GOAL_LINE_COLOR = '#3fa7d6'
+
+probe = RunProbe()
 
 # Title
 st.markdown("<h1 style='text-align: center; margin-top: -20px; margin-bottom: 5px;'>Daily Step Count Dashboard</h1>", unsafe_allow_html=True)
 st.markdown("<h4 style='text-align: center; color: gray; margin-top: 0px; margin-bottom: 15px;'>100-Day Walking Journey | Goal: 11,000 steps/day</h3>", unsafe_allow_html=True)
+data_status = st.empty()
+
+user = None
+if SQL_PATH or DATA_ROOT:
+    users = get_store().users()
+    user = st.query_params.get('user') or st.sidebar.selectbox("🚶 Walker", users)
+    if user not in users:
+        st.error("No step data found for this user.")
+        st.stop()
+
+with probe.stage('load_data'):
+    min_date, max_date = date_bounds(user)
 
 # Filters in columns
 col1, col2, col3, col4 = st.columns(4)
@@ -55,26 +132,36 @@ with col1:
         "📅 Date",
         ["All Days", "Last 30 Days", "Last 60 Days", "Custom Range"]
     )
-    
+
+    start_date, end_date = None, None
     if date_range == "Custom Range":
         date_col1, date_col2 = st.columns(2)
         with date_col1:
             start_date = st.date_input(
                 "Start Date",
-                value=df['Date'].min(),
-                min_value=df['Date'].min(),
-                max_value=df['Date'].max()
+                value=min_date,
+                min_value=min_date,
+                max_value=max_date
             )
         with date_col2:
             end_date = st.date_input(
                 "End Date",
-                value=df['Date'].max(),
-                min_value=df['Date'].min(),
-                max_value=df['Date'].max()
+                value=max_date,
+                min_value=min_date,
+                max_value=max_date
             )
 
+# Only the partitions the date filter reaches are loaded
+with probe.stage('load_data') as stage:
+    months = None if user is None or SQL_PATH else get_store().months_for_range(user, date_range, start_date, end_date)
+    dataset = get_dataset(user, months).refresh()
+    if dataset.df is not None:
+        stage.frame(dataset.df)
+
+data_status.markdown(f"<p style='text-align: center; color: gray; font-size: 13px; margin-top: -10px;'>Data as of {dataset.as_of:%d %b %Y, %H:%M:%S} | Latest day: {dataset.last_date:%d %b %Y}</p>", unsafe_allow_html=True)
+
 with col2:
-    location_options = ["All Locations"] + sorted(df['Location'].unique().tolist())
+    location_options = ["All Locations"] + dataset.filter_index.locations
     location = st.selectbox("📍 Location", location_options)
 
 with col3:
@@ -87,68 +174,20 @@ with col4:
     temp_options = ["All Temperatures"] + ['<10°C', '10-15°C', '15-20°C', '20-25°C', '25-30°C', '30-35°C', '35+°C']
     temp_range = st.selectbox("🌡️ Temperature", temp_options)
 
+if len(dataset.temp_issues) > 0:
+    st.warning(f"{len(dataset.temp_issues)} day(s) have an unreadable temperature and are left out of the temperature views.")
 
-filtered_df = df.copy()
-
-# Date range filter
-if date_range == 'Last 30 Days':
-    cutoff_date = filtered_df['Date'].max() - timedelta(days=30)
-    filtered_df = filtered_df[filtered_df['Date'] >= cutoff_date]
-elif date_range == 'Last 60 Days':
-    cutoff_date = filtered_df['Date'].max() - timedelta(days=60)
-    filtered_df = filtered_df[filtered_df['Date'] >= cutoff_date]
-elif date_range == 'Custom Range':
-    start_datetime = pd.to_datetime(start_date)
-    end_datetime = pd.to_datetime(end_date)
-    filtered_df = filtered_df[(filtered_df['Date'] >= start_datetime) & (filtered_df['Date'] <= end_datetime)]
-
-
-# Location filter
-if location != 'All Locations':
-    filtered_df = filtered_df[filtered_df['Location'] == location]
-
-# Day type filter
-if day_type == 'Weekdays':
-    filtered_df = filtered_df[filtered_df['Day_Type'] == 'Weekday']
-elif day_type == 'Weekends':
-    filtered_df = filtered_df[filtered_df['Day_Type'] == 'Weekend']
-elif day_type in ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']:
-    filtered_df = filtered_df[filtered_df['Day of week'] == day_type]
-
-# Temperature filter
-if temp_range != 'All Temperatures':
-    filtered_df = filtered_df[filtered_df['Temp_Bin'] == temp_range]
-
-# Calculate KPIs
-avg_steps = filtered_df['Step Count'].mean()
-goal_pct = (filtered_df['Step Count'] >= GOAL).sum() / len(filtered_df) * 100
-max_steps = filtered_df['Step Count'].max()
-min_steps = filtered_df['Step Count'].min()
+filters = (date_range, location, day_type, temp_range, start_date, end_date)
+figure_cache = dataset.figure_cache
+with probe.stage('filters') as stage:
+    # Rows come back in date order as views of the shared, read-only dataset
+    filtered_df = stage.frame(dataset.filter_index.select(*filters))
+    filtered_df_sorted = filtered_df
 
-# Most active day
-day_order = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
-most_active_day = filtered_df.groupby('Day of week')['Step Count'].mean().reindex(day_order).idxmax()
-
-# Most active location
-most_active_location = filtered_df.groupby('Location')['Step Count'].mean().idxmax()
-
-# Best temperature range
-best_temp = filtered_df.groupby('Temp_Bin', observed=True)['Step Count'].mean().idxmax()
-
-# Highest streak
-filtered_df_sorted = filtered_df.sort_values('Date')
-filtered_df_sorted['Met_Goal'] = filtered_df_sorted['Step Count'] >= GOAL
-
-
-highest_streak = 0
-current_streak_count = 0
-
-for met in filtered_df_sorted['Met_Goal'].tolist():
-    if met:
-        current_streak_count += 1
-        highest_streak = max(highest_streak, current_streak_count)
-    else:
-        current_streak_count = 0
+# Calculate KPIs (served from a cache shared by all sessions, keyed on the filters)
+with probe.stage('kpis'):
+    averages = dataset.rollup.averages(*filters)
+    kpis = dataset.kpi_engine.kpis(date_range, start_date, end_date, location, day_type, temp_range, GOAL)
 
 
 # KPIs display
@@ -172,27 +211,27 @@ kpi1, kpi2, kpi3, kpi4 = st.columns(4)
 with kpi1:
     st.metric(
         label="Average Daily Steps",
-        value=f"{avg_steps:,.0f}",
-        delta=f"{avg_steps - GOAL:,.0f} vs goal"
+        value=f"{kpis.avg_steps:,.0f}",
+        delta=f"{kpis.avg_steps - GOAL:,.0f} vs goal"
     )
 
 with kpi2:
     st.metric(
         label="% Days Goal Reached",
-        value=f"{goal_pct:.1f}%",
-        delta=f"{goal_pct - 50:.1f}% vs 50%"
+        value=f"{kpis.goal_pct:.1f}%",
+        delta=f"{kpis.goal_pct - 50:.1f}% vs 50%"
     )
 
 with kpi3:
     st.metric(
         label="Max. Steps in a Day",
-        value=f"{max_steps:,.0f}"
+        value=f"{kpis.max_steps:,.0f}"
     )
 
 with kpi4:
     st.metric(
         label="Min. Steps in a Day",
-        value=f"{min_steps:,.0f}"
+        value=f"{kpis.min_steps:,.0f}"
     )
 
 kpi5, kpi6, kpi7, kpi8 = st.columns(4)
@@ -200,25 +239,25 @@ kpi5, kpi6, kpi7, kpi8 = st.columns(4)
 with kpi5:
     st.metric(
         label="Most Active Day",
-        value=most_active_day
+        value=kpis.most_active_day
     )
 
 with kpi6:
     st.metric(
         label="Most Active Location",
-        value=most_active_location
+        value=kpis.most_active_location
     )
 
 with kpi7:
     st.metric(
         label="Best Temp. Range",
-        value=str(best_temp)
+        value=kpis.best_temp
     )
 
 with kpi8:
     st.metric(
         label="Highest Streak",
-        value=f"{highest_streak} days"
+        value=f"{kpis.highest_streak} days"
     )
 
 st.markdown("---")
@@ -227,6 +266,8 @@ st.markdown("---")
 #============================================
 # SIDE BY SIDE: CALENDAR + BUBBLE CHART
 # ============================================
+# Each section below is a fragment: its own widgets rerun only that section,
+# with the inputs it was last called with. The filters above rerun everything.
 st.markdown("<h3 style='text-align: center;'>How consistent is my daily activity?</h3>", unsafe_allow_html=True)
 
 
@@ -235,19 +276,12 @@ col_viz1, col_viz2 = st.columns([1, 1])
 # ============================================
 # LEFT COLUMN: INTERACTIVE MONTHLY CALENDAR
 # ============================================
-with col_viz1:
+@section('calendar')
+def calendar_section(probe, dataset, filters, figure_cache):
     st.markdown("<h4 style='text-align: center;'>📅 Monthly Calendar</h4>", unsafe_allow_html=True)
     
-    filtered_df_sorted['Year'] = filtered_df_sorted['Date'].dt.year
-    filtered_df_sorted['Month'] = filtered_df_sorted['Date'].dt.month
-    filtered_df_sorted['Day'] = filtered_df_sorted['Date'].dt.day
-    
-    available_months = filtered_df_sorted.groupby(['Year', 'Month']).size().reset_index()[['Year', 'Month']]
-    month_options = [f"{row['Year']}-{row['Month']:02d}" for _, row in available_months.iterrows()]
-    month_names = {
-        1: 'January', 2: 'February', 3: 'March', 4: 'April', 5: 'May', 6: 'June',
-        7: 'July', 8: 'August', 9: 'September', 10: 'October', 11: 'November', 12: 'December'
-    }
+    month_options = dataset.calendar_months(*filters)
+    month_names = dict(enumerate(MONTH_NAMES, start=1))
     
     selected_month_str = st.selectbox(
         "Select Month",
@@ -257,267 +291,46 @@ with col_viz1:
     
     selected_year = int(selected_month_str.split('-')[0])
     selected_month = int(selected_month_str.split('-')[1])
-    
 
-    month_df = filtered_df_sorted[
-        (filtered_df_sorted['Year'] == selected_year) & 
-        (filtered_df_sorted['Month'] == selected_month)
-    ].copy()
-
-
-    month_cal = cal.monthcalendar(selected_year, selected_month)
-
- 
-    x_positions = []
-    y_positions = []
-    day_numbers = []
-    colors = []
-    sizes = []
-    hover_texts = []
-
-    day_labels = ['Mon', 'Tue', 'Wed', 'Thu', 'Fri', 'Sat', 'Sun']
-
-
-    for week_idx, week in enumerate(month_cal):
-        for day_idx, day in enumerate(week):
-            if day == 0:
-                continue
-        
-            day_data = month_df[month_df['Day'] == day]
-        
-            if len(day_data) > 0:
-                steps = int(day_data.iloc[0]['Step Count'])
-                location = day_data.iloc[0]['Location']
-                temp = day_data.iloc[0]['Temperature']
-            
-                if steps >= 11000:
-                    color = '#10b981'
-                    status = '✅ Goal Met'
-                elif steps >= 8800: 
-                    color = '#f59e0b' 
-                    status = '⚠️ Close'
-                else:
-                    color = '#ef4444'
-                    status = '❌ Missed'
-            
-                
-                size_ratio = min(steps / 11000, 1.5) 
-                size = 30 + (size_ratio * 25)
-
-                x_positions.append(day_idx)
-                y_positions.append(len(month_cal) - week_idx - 1)
-                day_numbers.append(str(day))
-                colors.append(color)
-                sizes.append(size)
-                hover_texts.append(
-                    f"<b>{month_names[selected_month]} {day}, {selected_year}</b><br>" +
-                    f"🚶 Steps: {steps:,}<br>" +
-                    f"📍 Location: {location}<br>" +
-                    f"🌡️ Temperature: {temp}<br>" +
-                    f" Status: {status}"
-                )
-            else:
-                
-                x_positions.append(day_idx)
-                y_positions.append(len(month_cal) - week_idx - 1)
-                day_numbers.append(str(day))
-                colors.append('#e2e8f0')
-                sizes.append(35)
-                hover_texts.append(
-                    f"<b>{month_names[selected_month]} {day}, {selected_year}</b><br>No data"
-                )
-
-    fig_calendar = go.Figure()
-
-    fig_calendar.add_trace(go.Scatter(
-        x=x_positions,
-        y=y_positions,
-        mode='markers+text',
-        marker=dict(
-            size=sizes,
-            color=colors,
-            symbol='circle',
-            line=dict(width=2, color='white'),
-            opacity=0.9
-        ),
-        text=day_numbers,
-        textfont=dict(size=12, color='white', family='Arial Black'),
-        textposition='middle center',
-        hovertext=hover_texts,
-        hovertemplate='%{hovertext}<extra></extra>',
-        showlegend=False
-    ))
-
-    for i, day in enumerate(day_labels):
-        fig_calendar.add_annotation(
-            x=i, y=len(month_cal),
-            text=f"<b>{day}</b>",
-            showarrow=False,
-            font=dict(size=14, color='#64748b'),
-            xanchor='center',
-            yanchor='middle'
+    with probe.stage('calendar'):
+        fig_calendar = figure_cache.figure(
+            'calendar',
+            filters + (selected_year, selected_month, GOAL),
+            lambda: calendar_figure(
+                calendar_grid(dataset.calendar_rows(selected_year, selected_month, *filters), selected_year, selected_month, GOAL),
+                weeks_in_month(selected_year, selected_month)
+            )
         )
 
-    fig_calendar.add_trace(go.Scatter(
-        x=[None], y=[None],
-        mode='markers',
-        marker=dict(size=15, color=GREEN),
-        name='Goal Met (≥11k)',
-        showlegend=True
-    ))
-
-    fig_calendar.add_trace(go.Scatter(
-        x=[None], y=[None],
-        mode='markers',
-        marker=dict(size=15, color=AMBER),
-        name='Close (≥80%)',
-        showlegend=True
-    ))
-
-    fig_calendar.add_trace(go.Scatter(
-        x=[None], y=[None],
-        mode='markers',
-        marker=dict(size=15, color=RED),
-        name='Below Goal',
-        showlegend=True
-    ))
-
-
-    fig_calendar.update_layout(
-        xaxis=dict(
-            showgrid=False,
-            showticklabels=False,
-            zeroline=False,
-            range=[-0.5, 6.5]
-        ),
-        yaxis=dict(
-            showgrid=False,
-            showticklabels=False,
-            zeroline=False,
-            range=[-0.5, len(month_cal) + 0.5]
-        ),
-        height=500,
-        plot_bgcolor='white',
-        hovermode='closest',
-        showlegend=True,
-        legend=dict(
-            orientation="h",
-            yanchor="bottom",
-            y=-0.15,
-            xanchor="center",
-            x=0.5
-        ),
-        margin=dict(l=20, r=20, t=20, b=60)
-    )
+    with probe.stage('render'):
+        st.plotly_chart(fig_calendar, use_container_width=True)
 
-    st.plotly_chart(fig_calendar, use_container_width=True)
+with col_viz1:
+    calendar_section(probe, dataset, filters, figure_cache)
 
 # ============================================
 # RIGHT COLUMN: BUBBLE CHART
 # ============================================
-with col_viz2:
+@section('timeline')
+def timeline_section(probe, filtered_df_sorted, filters, figure_cache, dataset):
     st.markdown("<h4 style='text-align: center;'>🎯 Activity Timeline</h4>", unsafe_allow_html=True)
     
-    df_sorted = filtered_df_sorted.sort_values('Date')
-    
+    with probe.stage('timeline'):
+        fig_bubble = figure_cache.figure(
+            'timeline',
+            filters + (GOAL,),
+            lambda: timeline_figure(filtered_df_sorted, GOAL, dataset.trends_for(GOAL, *filters))
+        )
+    points_shown = fig_bubble['layout']['meta']['points_shown']
 
-    df_met = df_sorted[df_sorted['Step Count'] >= GOAL]
-    df_missed = df_sorted[df_sorted['Step Count'] < GOAL]
-    
-    fig_bubble = go.Figure()
-    
+    with probe.stage('render'):
+        st.plotly_chart(fig_bubble, use_container_width=True)
 
-    if len(df_met) > 0:
-        sizes_met = []
-        for temp in df_met['Avg_Temp']:
-            size = 15 + ((temp - 8) / 30) * 25
-            sizes_met.append(max(15, min(40, size)))
-        
-        fig_bubble.add_trace(
-            go.Scatter(
-                x=df_met['Date'],
-                y=df_met['Step Count'],
-                mode='markers',
-                name='Goal Met (≥11k)',
-                marker=dict(
-                    size=sizes_met,
-                    color=GREEN,
-                    line=dict(width=2, color='white'),
-                    opacity=0.8,
-                    sizemode='diameter'
-                ),
-                text=[f"<b>{row['Date'].strftime('%Y-%m-%d')}</b><br>" +
-                      f"🚶 Steps: {row['Step Count']:,}<br>" +
-                      f"📍 Location: {row['Location']}<br>" +
-                      f"🌡️ Temperature: {row['Temperature']}<br>" +
-                      f"✅ Goal Met"
-                      for _, row in df_met.iterrows()],
-                hovertemplate='%{text}<extra></extra>',
-                showlegend=True
-            )
-        )
-    
-    # goal missed (red)
-    if len(df_missed) > 0:
-        sizes_missed = []
-        for temp in df_missed['Avg_Temp']:
-            size = 15 + ((temp - 8) / 30) * 25
-            sizes_missed.append(max(15, min(40, size)))
-        
-        fig_bubble.add_trace(
-            go.Scatter(
-                x=df_missed['Date'],
-                y=df_missed['Step Count'],
-                mode='markers',
-                name='Goal Missed (<11k)',
-                marker=dict(
-                    size=sizes_missed,
-                    color=RED,
-                    line=dict(width=2, color='white'),
-                    opacity=0.8,
-                    sizemode='diameter'
-                ),
-                text=[f"<b>{row['Date'].strftime('%Y-%m-%d')}</b><br>" +
-                      f"🚶 Steps: {row['Step Count']:,}<br>" +
-                      f"📍 Location: {row['Location']}<br>" +
-                      f"🌡️ Temp: {row['Temperature']}<br>" +
-                      f"❌ Missed Goal"
-                      for _, row in df_missed.iterrows()],
-                hovertemplate='%{text}<extra></extra>',
-                showlegend=True
-            )
-        )
-    
-    # goal line
-    fig_bubble.add_trace(
-        go.Scatter(
-            x=[df_sorted['Date'].min(), df_sorted['Date'].max()],
-            y=[GOAL, GOAL],
-            mode='lines',
-            name='Goal (11,000 steps)',
-            line=dict(color=GOAL_LINE_COLOR, width=3, dash='dash'),
-            hovertemplate='Goal: %{y:,.0f} steps<extra></extra>',
-            showlegend=True
-        )
-    )
-    
-    fig_bubble.update_layout(
-        xaxis_title="Date",
-        yaxis_title="Step Count",
-        hovermode='closest',
-        height=500,
-        showlegend=True,
-        legend=dict(
-            orientation="h",
-            yanchor="bottom",
-            y=-0.25,
-            xanchor="center",
-            x=0.5
-        ),
-        margin=dict(l=40, r=20, t=20, b=80)
-    )
-    
-    st.plotly_chart(fig_bubble, use_container_width=True)
+    if points_shown < len(filtered_df_sorted):
+        st.caption(f"Showing the {points_shown:,} highest and lowest of {len(filtered_df_sorted):,} days. Narrow the date range for full detail.")
+
+with col_viz2:
+    timeline_section(probe, filtered_df_sorted, filters, figure_cache, dataset)
 
 st.markdown("""
     <div style='background-color: #f8fafc; padding: 12px; border-radius: 6px; font-size: 13px; margin-top: 15px; text-align: center;'>
@@ -532,265 +345,186 @@ st.markdown("---")
 # ============================================
 # BAR CHARTS - Three side by side
 # ============================================
+@section('bar_charts')
+def bar_charts_section(probe, averages, filters, figure_cache):
+    st.markdown("""
+    <div style='background-color: #f8fafc; padding: 10px; border-radius: 6px; font-size: 14px; text-align: center;'>
+        <span style='color: #59cd90; font-weight: bold;'>●</span> Goal Met (≥11k) | 
+        <span style='color: #ee6055; font-weight: bold;'>●</span> Goal Missed (<11k) | 
+        <span style='color: #3fa7d6; font-weight: bold;'>---</span> Goal Line
+    </div>
+    """, unsafe_allow_html=True)
 
+    st.markdown("<br>", unsafe_allow_html=True)
 
-st.markdown("""
-<div style='background-color: #f8fafc; padding: 10px; border-radius: 6px; font-size: 14px; text-align: center;'>
-    <span style='color: #59cd90; font-weight: bold;'>●</span> Goal Met (≥11k) | 
-    <span style='color: #ee6055; font-weight: bold;'>●</span> Goal Missed (<11k) | 
-    <span style='color: #3fa7d6; font-weight: bold;'>---</span> Goal Line
-</div>
-""", unsafe_allow_html=True)
+    bar_col1, bar_col2, bar_col3 = st.columns(3)
 
-st.markdown("<br>", unsafe_allow_html=True)
+    # ============================================
+    # CHART 1: BAR CHART - Day of Week
+    # ============================================
+    with bar_col1:
+        st.markdown("<h3 style='text-align: center;margin-bottom: -10px'>📅 Which days am I most active?</h3>", unsafe_allow_html=True)
 
-bar_col1, bar_col2, bar_col3 = st.columns(3)
+        with probe.stage('day_of_week'):
+            fig2 = figure_cache.figure('day_of_week', filters + (GOAL,), lambda: day_of_week_figure(averages.day_of_week, GOAL))
 
-# ============================================
-# CHART 1: BAR CHART - Day of Week
-# ============================================
-with bar_col1:
-    st.markdown("<h3 style='text-align: center;margin-bottom: -10px'>📅 Which days am I most active?</h3>", unsafe_allow_html=True)
+        with probe.stage('render'):
+            st.plotly_chart(fig2, use_container_width=True)
 
-    day_order = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
-    day_avg = filtered_df.groupby('Day of week')['Step Count'].mean()
+    # ============================================
+    # CHART 2: BAR CHART - Temperature
+    # ============================================
+    with bar_col2:
+        st.markdown("<h3 style='text-align: center;margin-bottom: -10px'>🌡️ How does temperature affect my walking habits?</h3>", unsafe_allow_html=True)
 
+        if len(averages.temp_bin) > 0:
+            with probe.stage('temperature'):
+                fig3 = figure_cache.figure('temperature', filters + (GOAL,), lambda: temperature_figure(averages.temp_bin, GOAL))
 
-    
-    day_order_filtered = []
-    day_avg_filtered = []
-    day_colors = []
-
-    for day in day_order:
-        if day in day_avg.index:
-            avg = day_avg[day]
-            day_order_filtered.append(day)
-            day_avg_filtered.append(avg)
-            color = GREEN if avg >= GOAL else RED
-            day_colors.append(color)
-
-    days_met = []
-    avg_met = []
-
-    days_missed = []
-    avg_missed = []
-
-    for day, avg in zip(day_order_filtered, day_avg_filtered):
-        if avg >= GOAL:
-            days_met.append(day)
-            avg_met.append(avg)
+            with probe.stage('render'):
+                st.plotly_chart(fig3, use_container_width=True)
         else:
-            days_missed.append(day)
-            avg_missed.append(avg)
-
-
-    fig2 = go.Figure()
-
-    fig2.add_trace(
-        go.Bar(
-            x=day_order_filtered,
-            y=day_avg_filtered,
-            marker=dict(color=day_colors),
-            text=[f'{int(avg):,}' for avg in day_avg_filtered],
-            textposition='outside',
-            hovertemplate='%{x}<br>Average: %{y:,.0f} steps<extra></extra>',
-            name = "Average Steps",
-            showlegend=False
-        )
-    )
+            st.info("No temperature data available for the selected filters.")
 
-    fig2.add_trace(
-        go.Scatter(
-            x=[None],
-            y=[None],
-            mode='markers',
-            marker=dict(size=12, color=GREEN),
-            name='Goal Met (≥11k)',
-            showlegend=False
-        )
-    )
+    # ============================================
+    # CHART 3: BAR CHART - Location
+    # ============================================
+    with bar_col3:
+        st.markdown("<h3 style='text-align: center; margin-bottom: -10px;'>📍 Where do I walk the most?</h3>", unsafe_allow_html=True)
 
-    fig2.add_trace(
-        go.Scatter(
-            x=[None],
-            y=[None],
-            mode='markers',
-            marker=dict(size=12, color=RED),
-            name='Goal Missed (<11k)',
-            showlegend=False
-        )
-    )
+        if len(averages.location) > 0:
+            with probe.stage('location'):
+                fig4 = figure_cache.figure('location', filters + (GOAL,), lambda: location_figure(averages.location, GOAL))
+
+            with probe.stage('render'):
+                st.plotly_chart(fig4, use_container_width=True)
+        else:
+            st.warning("No location data available for the selected filters.")
 
+bar_charts_section(probe, averages, filters, figure_cache)
 
-    fig2.update_layout(
-        xaxis_title="Day of Week",
-        yaxis_title="Average Step Count",
-        height=500,
-        showlegend=False,
-        shapes=[
-        dict(
-            type='line',
-            x0=-0.7,
-            x1=len(day_order_filtered) - 0.3,
-            y0=GOAL - 200,  
-            y1=GOAL - 200,
-            line=dict(color=GOAL_LINE_COLOR, width=2, dash='dash'),
-            xref='x',
-            yref='y'
-        )
-    ]
+# ============================================
+# GOAL WHAT-IF: every candidate goal at once
+# ============================================
+@section('what_if')
+def what_if_section(probe, dataset, filters):
+    st.markdown("---")
+    st.markdown("<h3 style='text-align: center;'>🎚️ What if my goal were different?</h3>", unsafe_allow_html=True)
+
+    range_col, step_col = st.columns([3, 1])
+    with range_col:
+        low, high = st.slider("Goal range", min_value=1000, max_value=30000, value=GOAL_SWEEP[:2], step=500)
+    with step_col:
+        step = st.select_slider("Step", options=[250, 500, 1000, 2500], value=GOAL_SWEEP[2])
+
+    with probe.stage('what_if'):
+        sweep = dataset.goal_sweep(candidate_goals(low, high, step), *filters)
+        fig_what_if = what_if_figure(sweep, GOAL)
+
+    with probe.stage('render'):
+        st.plotly_chart(fig_what_if, use_container_width=True)
+
+    st.dataframe(
+        sweep.rename(columns={
+            'goal_pct': '% Days Goal Reached', 'longest_streak': 'Longest Streak',
+            'met': 'Met', 'close': 'Close', 'missed': 'Missed'
+        }).round(1),
+        use_container_width=True
     )
 
-    st.plotly_chart(fig2, use_container_width=True)
+what_if_section(probe, dataset, filters)
 
 # ============================================
-# CHART 2: BAR CHART - Temperature
+# TEAM COMPARISON (only with several walkers, built on request)
 # ============================================
-with bar_col2:
-    st.markdown("<h3 style='text-align: center;margin-bottom: -10px'>🌡️ How does temperature affect my walking habits?</h3>", unsafe_allow_html=True)
-
-    temp_bin_avg = filtered_df.groupby('Temp_Bin', observed=True)['Step Count'].mean()
-
-    if len(temp_bin_avg) > 0:
-        temp_ranges = temp_bin_avg.index.tolist()
-        temp_colors = [GREEN if avg >= GOAL else RED for avg in temp_bin_avg]
-
-        fig3 = go.Figure()
-
-        fig3.add_trace(
-            go.Bar(
-                x=temp_ranges,
-                y=temp_bin_avg,
-                marker=dict(color=temp_colors),
-                text=[f'{int(avg):,}' for avg in temp_bin_avg],
-                textposition='outside',
-                hovertemplate='%{x}<br>Average: %{y:,.0f} steps<extra></extra>',
-                name = "Average Steps",
-                showlegend=False
-            )
+@section('cohort')
+def team_section(probe, user, filters, figure_cache):
+    st.markdown("---")
+    st.markdown("<h3 style='text-align: center;'>👥 How do I compare with the team?</h3>", unsafe_allow_html=True)
+    if not st.toggle("Compare with the team", key='show_team'):
+        return
+
+    with probe.stage('cohort'):
+        team = team_comparison(filters, GOAL)
+    me = team.kpis.loc[user]
+
+    team1, team2, team3, team4 = st.columns(4)
+    with team1:
+        st.metric(
+            label="Team Average Daily Steps",
+            value=f"{team.kpis['avg_steps'].mean():,.0f}",
+            delta=f"{me['avg_steps'] - team.kpis['avg_steps'].mean():,.0f} me vs team"
         )
-
-        fig3.add_trace(
-            go.Scatter(
-                x=[None],
-                y=[None],
-                mode='markers',
-                marker=dict(size=12, color=GREEN),
-                name='Goal Met (≥11k)',
-                showlegend=False
-            )
+    with team2:
+        st.metric(
+            label="Team Median % Days Goal Reached",
+            value=f"{team.kpis['goal_pct'].median():.1f}%"
         )
-
-        fig3.add_trace(
-            go.Scatter(
-                x=[None],
-                y=[None],
-                mode='markers',
-                marker=dict(size=12, color=RED),
-                name='Goal Missed (<11k)',
-                showlegend=False
-            )
+    with team3:
+        st.metric(
+            label="My Goal % Percentile",
+            value=f"{percentile_rank(team.kpis[['goal_pct']], user)['goal_pct']:.0f}th"
+        )
+    with team4:
+        st.metric(
+            label="Team Best Streak",
+            value=f"{team.kpis['highest_streak'].max():,.0f} days"
         )
 
+    team_col1, team_col2 = st.columns(2)
+    with team_col1:
+        with probe.stage('cohort'):
+            fig_team = figure_cache.figure(
+                'cohort_goal', filters + (GOAL,), lambda: cohort_goal_figure(team.kpis['goal_pct'], me['goal_pct'])
+            )
+        with probe.stage('render'):
+            st.plotly_chart(fig_team, use_container_width=True)
 
+    with team_col2:
+        st.dataframe(comparison_table(team.day_of_week, user).round(0))
+        st.dataframe(comparison_table(team.location, user).round(0))
 
-        fig3.update_layout(
-            xaxis_title="Temperature Range",
-            yaxis_title="Average Step Count",
-            height=500,
-            showlegend=False,
-            shapes=[
-        dict(
-            type='line',
-            x0=-0.7,
-            x1=len(temp_ranges) - 0.3,
-            y0=GOAL - 200,  
-            y1=GOAL - 200,
-            line=dict(color=GOAL_LINE_COLOR, width=2, dash='dash'),
-            xref='x',
-            yref='y'
-        )
-    ]
-    )
-
-        st.plotly_chart(fig3, use_container_width=True)
-    else:
-        st.info("No temperature data available for the selected filters.")
+if DATA_ROOT and not SQL_PATH and len(users) > 1:
+    team_section(probe, user, filters, figure_cache)
 
 # ============================================
-# CHART 3: BAR CHART - Location
+# HOURLY PROFILE (only with minute-level data, built on request)
 # ============================================
-with bar_col3:
-    st.markdown("<h3 style='text-align: center; margin-bottom: -10px;'>📍 Where do I walk the most?</h3>", unsafe_allow_html=True)
-
-    location_avg = filtered_df.groupby('Location')['Step Count'].mean().sort_values(ascending=False)
-
-    if len(location_avg) > 0:
-        locations = location_avg.index.tolist()
-        location_colors = [GREEN if avg >= GOAL else RED for avg in location_avg]
-
-        fig4 = go.Figure()
-
-        fig4.add_trace(
-            go.Bar(
-                x=locations,
-                y=location_avg,
-                marker=dict(color=location_colors),
-                text=[f'{int(avg):,}' for avg in location_avg],
-                textposition='outside',
-                hovertemplate='%{x}<br>Average: %{y:,.0f} steps<extra></extra>',
-                name = "Average Steps",
-                showlegend=False
-            )
+@section('hourly_profile')
+def hourly_profile_section(probe, dates, filters, figure_cache):
+    st.markdown("---")
+    st.markdown("<h3 style='text-align: center;'>⏱️ When during the day do I walk?</h3>", unsafe_allow_html=True)
+    if not st.toggle("Show the hourly profile", key='show_hourly'):
+        return
+
+    intraday = get_intraday()
+    with probe.stage('hourly_profile'):
+        fig_hourly = figure_cache.figure(
+            'hourly_profile',
+            filters,
+            lambda: hourly_profile_figure(intraday.hourly_profile(dates))
         )
 
-        fig4.add_trace(
-            go.Scatter(
-                x=[None],
-                y=[None],
-                mode='markers',
-                marker=dict(size=12, color=GREEN),
-                name='Goal Met (≥11k)',
-                showlegend=False
-            )
-        )
-
-        fig4.add_trace(
-            go.Scatter(
-                x=[None],
-                y=[None],
-                mode='markers',
-                marker=dict(size=12, color=RED),
-                name='Goal Missed (<11k)',
-                showlegend=False
-            )
-        )
-
-        fig4.update_layout(
-            xaxis_title="Location",
-            yaxis_title="Average Step Count",
-            height=500,
-            showlegend=False,
-            shapes=[
-        dict(
-            type='line',
-            x0=-0.7,
-            x1=len(locations) - 0.3,
-            y0=GOAL - 200,  
-            y1=GOAL - 200,
-            line=dict(color=GOAL_LINE_COLOR, width=2, dash='dash'),
-            xref='x',
-            yref='y'
-        )
-    ]
-    )
+    with probe.stage('render'):
+        st.plotly_chart(fig_hourly, use_container_width=True)
 
-        st.plotly_chart(fig4, use_container_width=True)
-    else:
-        st.warning("No location data available for the selected filters.")
+if INTRADAY_DIR and user is None:
+    hourly_profile_section(probe, filtered_df_sorted['Date'], filters, figure_cache)
 
 st.markdown("---")
 st.markdown("<p style='text-align: center; color: gray;'>🚶‍♂️ Keep moving towards your goals!</p>", unsafe_allow_html=True)
 
-
-
+# ============================================
+# DEVELOPER PANEL: stage timings of this run
+# ============================================
+metrics = get_metrics()
+metrics.finish(probe, user=user, filters=filters)
+
+if DEV_PANEL or st.query_params.get('dev') == '1':
+    with st.sidebar:
+        st.markdown("### 🛠️ Stage timings")
+        st.caption(f"This run: {probe.elapsed() * 1000:,.0f} ms")
+        st.dataframe(probe.table(), hide_index=True)
+        st.markdown("**Figure cache**")
+        st.dataframe(figure_cache.timings(), hide_index=True)
+        st.download_button("Prometheus metrics", metrics.prometheus_text(), file_name="step_dashboard.prom")
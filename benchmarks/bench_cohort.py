@@ -0,0 +1,93 @@
+"""Check the cohort engine against the single-user KPIs, user by user, and time both.
+
+Writes a synthetic cohort as per-user partitions in a temporary directory.
+
+    python benchmarks/bench_cohort.py --users 200 --days 365
+"""
+import argparse
+import math
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bench_pipeline import make_records
+
+from step_dashboard.cohort import compare_cohort
+from step_dashboard.partitions import PartitionedStore, write_partitions
+from step_dashboard.report import load_dataset
+
+GOAL = 11000
+FILTERS = [
+    ('All Days', 'All Locations', 'All Days', 'All Temperatures', None, None),
+    ('Last 30 Days', 'All Locations', 'Weekends', 'All Temperatures', None, None),
+    ('Last 60 Days', 'Madrid', 'All Days', '20-25°C', None, None),
+]
+
+
+def single_user_kpis(root, users, filters):
+    store = PartitionedStore(root)
+    date_range, location, day_type, temp_range, start_date, end_date = filters
+    results = {}
+    for user in users:
+        dataset = load_dataset(user, store=store)
+        if len(dataset.filter_index.positions(*filters)) == 0:
+            results[user] = None
+            continue
+        results[user] = dataset.kpi_engine.kpis(date_range, start_date, end_date, location, day_type, temp_range, GOAL)
+    return results
+
+
+def same(expected, row):
+    for field, value in vars(expected).items():
+        actual = row[field]
+        if isinstance(value, str):
+            if value != actual:
+                return False
+        elif not math.isclose(float(value), float(actual), rel_tol=1e-9):
+            return False
+    return True
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--users', type=int, default=200)
+    parser.add_argument('--days', type=int, default=365)
+    parser.add_argument('--workers', type=int)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as root:
+        users = [f"walker{i:05d}" for i in range(args.users)]
+        for seed, user in enumerate(users):
+            # One record per day, as in a real export
+            records = make_records(args.days, seed=seed, days=args.days).drop_duplicates('Date')
+            write_partitions(records, root, user)
+
+        for filters in FILTERS:
+            start = time.perf_counter()
+            expected = single_user_kpis(root, users, filters)
+            loop_time = time.perf_counter() - start
+
+            start = time.perf_counter()
+            cohort = compare_cohort(root, users, filters, GOAL, workers=args.workers)
+            cohort_time = time.perf_counter() - start
+
+            for user, kpis in expected.items():
+                row = cohort.kpis.loc[user]
+                if kpis is None:
+                    assert row['days'] == 0, user
+                else:
+                    assert same(kpis, row), (user, kpis, row.to_dict())
+            assert np.isfinite(cohort.day_of_week.to_numpy(dtype='float64')).any()
+
+            print(f"{filters[0]} / {filters[1]} / {filters[2]} / {filters[3]}: {args.users} users")
+            print(f"  single-user loop: {loop_time:7.2f} s")
+            print(f"  cohort engine:    {cohort_time:7.2f} s  ({loop_time / cohort_time:.1f}x)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,74 @@
+"""Compare the vectorized derived columns with the old row-wise apply version.
+
+    python benchmarks/bench_derive.py --rows 1000000
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from step_dashboard.derive import TEMP_BINS, TEMP_LABELS, derive_columns
+
+
+def derive_with_apply(df):
+    def extract_avg_temp(temp_str):
+        temps = temp_str.replace('ºC', '').split('-')
+        min_temp = int(temps[0])
+        max_temp = int(temps[1])
+        return (min_temp + max_temp) / 2
+
+    df['Avg_Temp'] = df['Temperature'].apply(extract_avg_temp)
+    df['Temp_Bin'] = pd.cut(df['Avg_Temp'], bins=TEMP_BINS, labels=TEMP_LABELS, right=False)
+    df['Day_Type'] = df['Day of week'].apply(lambda x: 'Weekend' if x in ['Saturday', 'Sunday'] else 'Weekday')
+    return df
+
+
+def make_frame(rows, seed=0):
+    rng = np.random.default_rng(seed)
+    low = rng.integers(0, 30, rows)
+    high = low + rng.integers(1, 15, rows)
+    days = np.array(['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday'])
+    return pd.DataFrame({
+        'Day of week': days[rng.integers(0, 7, rows)],
+        'Temperature': [f"{lo}ºC-{hi}ºC" for lo, hi in zip(low, high)],
+    })
+
+
+def best_of(fn, df, repeat):
+    timings = []
+    for _ in range(repeat):
+        frame = df.copy()
+        start = time.perf_counter()
+        fn(frame)
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, default=1_000_000)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    df = make_frame(args.rows)
+
+    expected = derive_with_apply(df.copy())
+    actual, report = derive_columns(df.copy())
+    assert report.empty
+    for column in ['Avg_Temp', 'Temp_Bin', 'Day_Type']:
+        assert (expected[column].astype(str) == actual[column].astype(str)).all(), column
+
+    apply_time = best_of(derive_with_apply, df, args.repeat)
+    vector_time = best_of(lambda frame: derive_columns(frame), df, args.repeat)
+    print(f"rows: {args.rows:,}")
+    print(f"apply:      {apply_time:8.3f} s")
+    print(f"vectorized: {vector_time:8.3f} s  ({apply_time / vector_time:.1f}x)")
+
+
+if __name__ == '__main__':
+    main()
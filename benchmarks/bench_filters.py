@@ -0,0 +1,116 @@
+"""Check FilterIndex against the old boolean-mask chain and time both.
+
+Every combination of the four filter selectboxes is compared row for row.
+
+    python benchmarks/bench_filters.py --rows 100000
+"""
+import argparse
+import itertools
+import os
+import sys
+import time
+from datetime import timedelta
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from step_dashboard.derive import TEMP_LABELS, derive_columns
+from step_dashboard.filters import ALL_LOCATIONS, ALL_TEMPERATURES, DAY_ORDER, DAY_TYPES, FilterIndex
+
+
+def filter_with_masks(df, date_range, location, day_type, temp_range, start_date=None, end_date=None):
+    filtered_df = df.copy()
+
+    if date_range == 'Last 30 Days':
+        cutoff_date = filtered_df['Date'].max() - timedelta(days=30)
+        filtered_df = filtered_df[filtered_df['Date'] >= cutoff_date]
+    elif date_range == 'Last 60 Days':
+        cutoff_date = filtered_df['Date'].max() - timedelta(days=60)
+        filtered_df = filtered_df[filtered_df['Date'] >= cutoff_date]
+    elif date_range == 'Custom Range':
+        start_datetime = pd.to_datetime(start_date)
+        end_datetime = pd.to_datetime(end_date)
+        filtered_df = filtered_df[(filtered_df['Date'] >= start_datetime) & (filtered_df['Date'] <= end_datetime)]
+
+    if location != 'All Locations':
+        filtered_df = filtered_df[filtered_df['Location'] == location]
+
+    if day_type == 'Weekdays':
+        filtered_df = filtered_df[filtered_df['Day_Type'] == 'Weekday']
+    elif day_type == 'Weekends':
+        filtered_df = filtered_df[filtered_df['Day_Type'] == 'Weekend']
+    elif day_type in DAY_ORDER:
+        filtered_df = filtered_df[filtered_df['Day of week'] == day_type]
+
+    if temp_range != 'All Temperatures':
+        filtered_df = filtered_df[filtered_df['Temp_Bin'] == temp_range]
+
+    return filtered_df
+
+
+def make_frame(rows, seed=0):
+    rng = np.random.default_rng(seed)
+    dates = pd.Timestamp('2020-01-01') + pd.to_timedelta(np.sort(rng.integers(0, 3650, rows)), unit='D')
+    low = rng.integers(0, 30, rows)
+    high = low + rng.integers(1, 15, rows)
+    locations = np.array(['Madrid', 'Tenerife', 'Valencia', 'El Hierro', 'Bilbao', 'La Palma', 'Paris'])
+    df = pd.DataFrame({
+        'Date': dates,
+        'Step Count': rng.integers(500, 25000, rows),
+        'Location': locations[rng.integers(0, len(locations), rows)],
+        'Day of week': dates.day_name(),
+        'Temperature': [f"{lo}ºC-{hi}ºC" for lo, hi in zip(low, high)],
+    })
+    return derive_columns(df)[0]
+
+
+def combinations(df):
+    dates = df['Date']
+    custom = (dates.iloc[len(dates) // 4].date(), dates.iloc[len(dates) // 2].date())
+    date_ranges = [('All Days', None, None), ('Last 30 Days', None, None),
+                   ('Last 60 Days', None, None), ('Custom Range', *custom)]
+    locations = [ALL_LOCATIONS] + sorted(df['Location'].unique().tolist())
+    temps = [ALL_TEMPERATURES] + TEMP_LABELS
+    for (date_range, start, end), location, day_type, temp in itertools.product(date_ranges, locations, DAY_TYPES, temps):
+        yield date_range, location, day_type, temp, start, end
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, default=100_000)
+    parser.add_argument('--sample', type=int, default=50,
+                        help='filter combinations to time (all are checked)')
+    args = parser.parse_args()
+
+    df = make_frame(args.rows)
+    start = time.perf_counter()
+    index = FilterIndex(df)
+    build_time = time.perf_counter() - start
+
+    combos = list(combinations(df))
+    for combo in combos:
+        expected = filter_with_masks(df, *combo)
+        actual = index.select(*combo)
+        assert expected.index.equals(actual.index), combo
+
+    timed = combos[::max(1, len(combos) // args.sample)]
+    start = time.perf_counter()
+    for combo in timed:
+        filter_with_masks(df, *combo)
+    mask_time = (time.perf_counter() - start) / len(timed)
+
+    start = time.perf_counter()
+    for combo in timed:
+        index.select(*combo)
+    index_time = (time.perf_counter() - start) / len(timed)
+
+    print(f"rows: {args.rows:,}, combinations checked: {len(combos)}")
+    print(f"index build:   {build_time * 1000:8.1f} ms (once per dataset)")
+    print(f"mask chain:    {mask_time * 1000:8.2f} ms per rerun")
+    print(f"filter index:  {index_time * 1000:8.2f} ms per rerun  ({mask_time / index_time:.1f}x)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,141 @@
+"""Memory of the derived dataset before and after the compact schema.
+
+"Before" is the same frame with labels as Python strings, int64 step
+counts and float64 temperatures, which is what the loader used to cache.
+Both the in-memory size and the pickled size (what ``st.cache_data``
+copies per access) are reported, per column and in total.
+
+The second report holds one "All Days" selection per simulated session:
+before, each session unpickled its own copy of the frame, copied it and
+sorted it; now each one holds a view of the shared read-only dataset.
+While those views are alive, every kind of write to the shared frame is
+tried and must raise.
+
+    python benchmarks/bench_memory.py --rows 1000000
+"""
+import argparse
+import os
+import pickle
+import sys
+import tracemalloc
+
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bench_pipeline import make_records
+
+from step_dashboard.dataset import StepDataset
+from step_dashboard.derive import derive_columns
+from step_dashboard.ingest import SOURCE_PATH, read_source
+
+# A session's view costs a few KiB of pandas objects whatever the row count
+SHARED_SESSION_LIMIT = 64 * 1024
+
+
+def expanded(df, strings=object):
+    """``df`` with the compact dtypes undone."""
+    wide = df.copy()
+    for column in wide.columns:
+        if isinstance(wide[column].dtype, pd.CategoricalDtype) and column != 'Temp_Bin':
+            wide[column] = wide[column].astype(strings)
+    wide['Step Count'] = wide['Step Count'].astype('int64')
+    wide['Avg_Temp'] = wide['Avg_Temp'].astype('float64')
+    return wide
+
+
+def report(name, df):
+    before = expanded(df)
+    before_str = expanded(df, strings='str')
+    columns = pd.DataFrame({
+        'object': before.memory_usage(deep=True),
+        'str': before_str.memory_usage(deep=True),
+        'compact': df.memory_usage(deep=True),
+    })
+    columns.loc['total'] = columns.sum()
+    columns.loc['pickled'] = [len(pickle.dumps(frame)) for frame in (before, before_str, df)]
+    ratio = columns.loc['total', 'object'] / columns.loc['total', 'compact']
+
+    print(f"{name}: {len(df):,} rows")
+    print((columns / 1024).round(1).rename(columns=lambda c: f"{c} KiB").to_string())
+    print(f"reduction vs object strings: {ratio:.1f}x, vs str: "
+          f"{columns.loc['total', 'str'] / columns.loc['total', 'compact']:.1f}x\n")
+    return ratio
+
+
+def shared_writes(df):
+    """The ways a session could write to the shared frame, by name."""
+    row, column = df.index[0], df.columns.get_loc('Step Count')
+    return {
+        "df['Step Count'] = ...": lambda: df.__setitem__('Step Count', 1),
+        "df.loc[row, 'Step Count'] = ...": lambda: df.loc.__setitem__((row, 'Step Count'), 1),
+        "df.iloc[i, j] = ...": lambda: df.iloc.__setitem__((2, column), 7),
+        "df.at[row, 'Step Count'] = ...": lambda: df.at.__setitem__((row, 'Step Count'), 1),
+        "df.iat[i, j] = ...": lambda: df.iat.__setitem__((0, column), 1),
+        "df.Avg_Temp = ...": lambda: setattr(df, 'Avg_Temp', 0.0),
+        "df.update(...)": lambda: df.update(pd.DataFrame({'Step Count': [1]}, index=[row])),
+        "sort_values(inplace=True)": lambda: df.sort_values('Step Count', inplace=True),
+        "rename(inplace=True)": lambda: df.rename(columns={'Date': 'Day'}, inplace=True),
+        "fillna(inplace=True)": lambda: df.fillna(0, inplace=True),
+    }
+
+
+def check_frozen(dataset, held):
+    """Every write to the shared frame raises while the ``held`` selections are alive.
+
+    Under copy-on-write a live view makes pandas copy a column before
+    writing it, so the arrays' read-only flag alone would not catch these.
+    """
+    before = dataset.df.copy()
+    writes = shared_writes(dataset.df)
+    for name, write in writes.items():
+        try:
+            write()
+        except TypeError:
+            continue
+        raise AssertionError(f"{name} changed the shared dataset")
+    assert dataset.df.equals(before)
+    print(f"shared frame: all {len(writes)} kinds of write refused while {len(held)} selections are held\n")
+
+
+def session_report(df, sessions):
+    everything = ('All Days', 'All Locations', 'All Days', 'All Temperatures')
+    dataset = StepDataset(df)
+    results = {}
+    for name, per_session in [
+        ('copies', lambda: pickle.loads(pickle.dumps(df)).copy().sort_values('Date')),
+        ('shared', lambda: dataset.filter_index.select(*everything)),
+    ]:
+        tracemalloc.start()
+        held = [per_session() for _ in range(sessions)]
+        results[name] = tracemalloc.get_traced_memory()[0] / sessions
+        tracemalloc.stop()
+        if name == 'shared':
+            check_frozen(dataset, held)
+        del held
+
+    print(f"per-session memory, {sessions} sessions: copies {results['copies'] / 1024:,.1f} KiB, "
+          f"shared {results['shared'] / 1024:,.1f} KiB\n")
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, default=1_000_000)
+    parser.add_argument('--sessions', type=int, default=20)
+    args = parser.parse_args()
+    if args.rows < 100:
+        # Below that the categories' fixed cost outweighs what they save
+        parser.error("--rows must be at least 100")
+
+    if os.path.exists(SOURCE_PATH):
+        report(SOURCE_PATH, derive_columns(read_source(SOURCE_PATH))[0])
+    df = derive_columns(make_records(args.rows))[0]
+    ratio = report('synthetic', df)
+    assert ratio >= 4, f"compact schema saves only {ratio:.1f}x"
+    sessions = session_report(df, args.sessions)
+    assert sessions['shared'] < min(sessions['copies'], SHARED_SESSION_LIMIT), sessions
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,188 @@
+"""Time and measure every stage of a dashboard rerun on synthetic data.
+
+Runs headless: the stages are the functions the dashboard calls, with no
+Streamlit server or browser. Each stage reports wall time and the peak
+memory it allocated (tracemalloc, which also slows the stages down, so
+compare runs made with the same flags). Results are written as JSON so two
+revisions can be compared:
+
+    python benchmarks/bench_pipeline.py --rows 100 10000 1000000 --output new.json
+    python benchmarks/bench_pipeline.py --rows 10000000 --baseline old.json
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timezone
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from step_dashboard.calendar_grid import calendar_grid, weeks_in_month
+from step_dashboard.dataset import StepDataset
+from step_dashboard.figures import (
+    calendar_figure, day_of_week_figure, location_figure, temperature_figure, timeline_figure
+)
+from step_dashboard.kpis import compute_kpis
+from step_dashboard.report import DEFAULT_GOAL, filter_combinations, load_frame
+
+LOCATIONS = ['Madrid', 'Tenerife', 'Valencia', 'El Hierro', 'Bilbao', 'La Palma', 'Paris']
+
+
+def make_records(rows, seed=0, days=3650):
+    """Raw records in the workbook schema: Date, Step Count, Location, Day of week, Temperature.
+
+    Up to ``days`` consecutive dates; beyond that, several records share a
+    date as if many walkers were stacked into one file.
+    """
+    rng = np.random.default_rng(seed)
+    span = min(rows, days)
+    dates = pd.Timestamp('2020-01-01') + pd.to_timedelta(np.sort(rng.integers(0, span, rows)), unit='D')
+    # The export repeats a small set of range strings; draw codes into that set
+    ranges = np.array([f"{low}ºC-{low + width}ºC" for low in range(30) for width in range(1, 15)], dtype=object)
+    return pd.DataFrame({
+        'Date': dates,
+        'Step Count': rng.integers(500, 25000, rows),
+        'Location': np.array(LOCATIONS, dtype=object)[rng.integers(0, len(LOCATIONS), rows)],
+        'Day of week': dates.day_name(),
+        'Temperature': ranges[rng.integers(0, len(ranges), rows)],
+    })
+
+
+class StageTimer:
+    """Collects (stage, seconds, peak bytes) for one dataset size."""
+
+    def __init__(self, rows, trace_memory=True):
+        self.rows = rows
+        self.trace_memory = trace_memory
+        self.results = []
+
+    def run(self, stage, fn, repeat=1):
+        if self.trace_memory:
+            tracemalloc.reset_peak()
+            before = tracemalloc.get_traced_memory()[0]
+        start = time.perf_counter()
+        for _ in range(repeat):
+            value = fn()
+        seconds = (time.perf_counter() - start) / repeat
+        peak = tracemalloc.get_traced_memory()[1] - before if self.trace_memory else None
+        self.results.append({'rows': self.rows, 'stage': stage, 'seconds': seconds, 'peak_bytes': peak})
+        return value
+
+
+def run_size(rows, sample, trace_memory, workdir):
+    timer = StageTimer(rows, trace_memory)
+    records = timer.run('generate', lambda: make_records(rows))
+    source = os.path.join(workdir, f"records_{rows}.parquet")
+    timer.run('write_source', lambda: records.to_parquet(source, index=False))
+    del records
+
+    df, temp_issues = timer.run('load', lambda: load_frame(source=source))
+    dataset = timer.run('build_indexes', lambda: StepDataset(df, temp_issues))
+
+    combos = list(filter_combinations(dataset))
+    combos = combos[::max(1, len(combos) // sample)]
+    timer.run('filters', lambda: [dataset.filter_index.select(*combo) for combo in combos])
+    timer.results[-1]['seconds'] /= len(combos)
+    timer.run('averages', lambda: [dataset.rollup.averages(*combo) for combo in combos])
+    timer.results[-1]['seconds'] /= len(combos)
+
+    everything = ('All Days', 'All Locations', 'All Days', 'All Temperatures', None, None)
+    selected = dataset.filter_index.select(*everything)
+    averages = dataset.rollup.averages(*everything)
+    timer.run('kpis', lambda: compute_kpis(selected, DEFAULT_GOAL, averages))
+
+    selected_sorted = selected.sort_values('Date')
+    last = selected_sorted['Date'].iloc[-1]
+    figures = {}
+    figures['calendar'] = timer.run('calendar', lambda: calendar_figure(
+        calendar_grid(selected_sorted, last.year, last.month, DEFAULT_GOAL), weeks_in_month(last.year, last.month)
+    ))
+    figures['timeline'] = timer.run('timeline', lambda: timeline_figure(selected_sorted, DEFAULT_GOAL))
+    figures['bars'] = timer.run('bars', lambda: [
+        day_of_week_figure(averages.day_of_week, DEFAULT_GOAL),
+        temperature_figure(averages.temp_bin, DEFAULT_GOAL),
+        location_figure(averages.location, DEFAULT_GOAL),
+    ])
+    timer.run('serialize', lambda: [
+        fig.to_json() for fig in [figures['calendar'], figures['timeline'], *figures['bars']]
+    ])
+
+    timer.results.append({
+        'rows': rows, 'stage': 'frame_memory', 'seconds': None,
+        'peak_bytes': int(df.memory_usage(deep=True).sum()),
+    })
+    return timer.results
+
+
+def revision():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, check=True,
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def format_bytes(value):
+    return '' if value is None else f"{value / 2 ** 20:10.1f} MiB"
+
+
+def print_results(results, baseline=None):
+    previous = {(r['rows'], r['stage']): r for r in baseline['results']} if baseline else {}
+    print(f"{'rows':>10}  {'stage':<14}{'time':>12}{'peak memory':>16}{'vs baseline':>14}")
+    for result in results:
+        seconds = '' if result['seconds'] is None else f"{result['seconds'] * 1000:9.2f} ms"
+        old = previous.get((result['rows'], result['stage']))
+        ratio = ''
+        if old and old['seconds'] and result['seconds']:
+            ratio = f"{result['seconds'] / old['seconds']:.2f}x"
+        print(f"{result['rows']:>10,}  {result['stage']:<14}{seconds:>12}{format_bytes(result['peak_bytes']):>16}{ratio:>14}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, nargs='+', default=[100, 10_000, 1_000_000])
+    parser.add_argument('--sample', type=int, default=20, help='filter combinations timed per size')
+    parser.add_argument('--no-memory', action='store_true', help='skip tracemalloc (faster at 10M rows)')
+    parser.add_argument('--output', help='write the results to this JSON file')
+    parser.add_argument('--baseline', help='JSON results of another revision to compare with')
+    args = parser.parse_args()
+
+    results = []
+    with tempfile.TemporaryDirectory() as workdir:
+        # Plotly loads its validators on first use; keep that out of the first size
+        run_size(100, 1, False, workdir)
+        if not args.no_memory:
+            tracemalloc.start()
+        for rows in args.rows:
+            results.extend(run_size(rows, args.sample, not args.no_memory, workdir))
+
+    report = {
+        'revision': revision(),
+        'created': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'pandas': pd.__version__,
+        'numpy': np.__version__,
+        'results': results,
+    }
+    baseline = None
+    if args.baseline:
+        with open(args.baseline, encoding='utf-8') as f:
+            baseline = json.load(f)
+    print_results(results, baseline)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,104 @@
+"""Time calendar navigation in the running dashboard script.
+
+Pages through every month of the calendar with Streamlit's AppTest and
+reports the mean time per "Select Month" change. AppTest itself always
+reruns the whole script, so when the calendar is a fragment the rerun is
+scoped to it, as the browser does for a widget inside a fragment. That goes
+through AppTest internals; where they differ, or AppTest does not keep
+fragments between runs, the benchmark says so and times full reruns.
+Streamlit 1.40's AppTest cannot change a selectbox with a ``format_func``
+such as "Select Month", so run it on a newer Streamlit. Pass an older
+checkout's script to compare before and after:
+
+    python benchmarks/bench_rerun.py
+    python benchmarks/bench_rerun.py --script /tmp/old/Daily_Step_Count_Dashboard.py
+"""
+import argparse
+import functools
+import inspect
+import json
+import logging
+import os
+import time
+
+from streamlit.runtime.scriptrunner import RerunData
+from streamlit.testing.v1 import AppTest, local_script_runner
+
+SCRIPT = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'Daily_Step_Count_Dashboard.py')
+
+
+class RunLog(logging.Handler):
+    """Collects the per-run JSON lines of step_dashboard.instrument."""
+
+    def __init__(self):
+        super().__init__()
+        self.runs = []
+
+    def emit(self, record):
+        self.runs.append(json.loads(record.getMessage()))
+
+
+def month_selectbox(at):
+    return next(selectbox for selectbox in at.selectbox if selectbox.label == "Select Month")
+
+
+def fragment_id(at, name):
+    """Id of the fragment that runs the function called ``name``, or None."""
+    # AppTest's fragment storage is private; each fragment closes over the function it runs
+    fragments = getattr(getattr(at, '_fragment_storage', None), '_fragments', {})
+    for fragment_id, fragment in fragments.items():
+        func = inspect.getclosurevars(fragment).nonlocals.get('non_optional_func')
+        if getattr(func, '__name__', None) == name:
+            return fragment_id
+    return None
+
+
+def scope_reruns(at, name):
+    """Send later reruns to the fragment running ``name``, if the script has one and AppTest keeps it."""
+    scoped_id = fragment_id(at, name)
+    if scoped_id is None or 'fragment_id' not in inspect.signature(RerunData).parameters:
+        return False
+    # This mirrors what the frontend sends for a widget inside the fragment
+    local_script_runner.RerunData = functools.partial(RerunData, fragment_id=scoped_id)
+    return True
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--script', default=SCRIPT)
+    parser.add_argument('--rounds', type=int, default=3)
+    args = parser.parse_args()
+
+    log = RunLog()
+    logger = logging.getLogger('step_dashboard.instrument')
+    logger.addHandler(log)
+    logger.setLevel(logging.INFO)
+
+    # The script resolves the workbook relative to its own directory
+    os.chdir(os.path.dirname(os.path.abspath(args.script)))
+    at = AppTest.from_file(args.script, default_timeout=120).run()
+    assert not at.exception, at.exception
+    months = list(range(len(month_selectbox(at).options)))
+    scoped = scope_reruns(at, 'calendar_section')
+
+    times = []
+    for _ in range(args.rounds):
+        # Every month once, so all calendar figures are cached after the first round
+        for month in months[1:] + months[:1]:
+            start = time.perf_counter()
+            month_selectbox(at).select_index(month).run()
+            times.append(time.perf_counter() - start)
+            assert not at.exception, at.exception
+
+    runs = log.runs[1:]
+    fragments = sum(1 for run in runs if run.get('fragment') == 'calendar')
+    script_ms = [run['total_ms'] for run in runs]
+    print(f"{args.script}")
+    print(f"month changes: {len(times)}, calendar reruns: {'fragment only' if scoped else 'full script'}, fragment reruns logged: {fragments}")
+    print(f"mean rerun (AppTest round trip): {sum(times) / len(times) * 1000:8.2f} ms")
+    if script_ms:
+        print(f"mean measured run:               {sum(script_ms) / len(script_ms):8.2f} ms")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,103 @@
+"""Build the static snapshot bundle and check it against the dashboard's figures.
+
+For a sample of filter combinations the stored KPIs and every stored
+figure are compared with what the dashboard builds for the same inputs.
+Reports the build time, how many figure references deduplicated into how
+many files, and the compressed and uncompressed sizes.
+
+    python benchmarks/bench_snapshot.py --workers 4
+"""
+import argparse
+import gzip
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from step_dashboard.calendar_grid import calendar_grid, weeks_in_month
+from step_dashboard.figures import (
+    calendar_figure, day_of_week_figure, location_figure, temperature_figure, timeline_figure
+)
+from step_dashboard.ingest import SOURCE_PATH
+from step_dashboard.report import DEFAULT_GOAL, load_dataset, report
+from step_dashboard.snapshot import FIGURE_DIR, MANIFEST, build_snapshots, read_manifest
+
+
+def stored_figure(out, digest):
+    with gzip.open(os.path.join(out, FIGURE_DIR, f"{digest}.json.gz"), 'rt', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def expected_figures(dataset, filters, goal):
+    """The figures the dashboard draws for ``filters``, built the way it builds them."""
+    rows = dataset.filter_index.select(*filters)
+    averages = dataset.rollup.averages(*filters)
+    figures = {
+        'timeline': timeline_figure(rows, goal, dataset.trends_for(goal, *filters)),
+        'day_of_week': day_of_week_figure(averages.day_of_week, goal),
+        'temperature': temperature_figure(averages.temp_bin, goal) if len(averages.temp_bin) else None,
+        'location': location_figure(averages.location, goal) if len(averages.location) else None,
+    }
+    for month in rows['Date'].dt.strftime('%Y-%m').unique():
+        year, number = int(month[:4]), int(month[5:])
+        figures[f'calendar {month}'] = calendar_figure(calendar_grid(rows, year, number, goal), weeks_in_month(year, number))
+    return figures
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--source', default=SOURCE_PATH)
+    parser.add_argument('--workers', type=int)
+    parser.add_argument('--sample', type=int, default=40)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as out:
+        start = time.perf_counter()
+        built = build_snapshots(out, source=args.source, workers=args.workers)
+        build_time = time.perf_counter() - start
+        start = time.perf_counter()
+        assert build_snapshots(out, source=args.source, workers=args.workers) == {}
+        check_time = time.perf_counter() - start
+
+        manifest = read_manifest(os.path.join(out, MANIFEST))
+        dataset = load_dataset(source=args.source)
+        keys = random.Random(0).sample(sorted(manifest['snapshots']), args.sample)
+        for key in keys:
+            entry = manifest['snapshots'][key]
+            filters = tuple(key.split('|')) + (None, None)
+            expected = report(dataset, filters, DEFAULT_GOAL)
+            assert json.loads(json.dumps({name: expected[name] for name in ('rows', 'kpis', 'averages')})) == {
+                name: entry[name] for name in ('rows', 'kpis', 'averages')
+            }, key
+            if not entry['rows']:
+                continue
+            stored = {name: digest for name, digest in entry['figures'].items() if name != 'calendar'}
+            stored.update({f'calendar {month}': digest for month, digest in entry['figures']['calendar'].items()})
+            figures = expected_figures(dataset, filters, DEFAULT_GOAL)
+            assert stored.keys() == figures.keys(), key
+            for name, figure in figures.items():
+                if figure is None:
+                    assert stored[name] is None, (key, name)
+                else:
+                    assert stored_figure(out, stored[name]) == json.loads(figure.to_json()), (key, name)
+
+        references = sum(
+            len(entry['figures']['calendar']) + sum(1 for name, value in entry['figures'].items() if name != 'calendar' and value)
+            for entry in manifest['snapshots'].values() if entry['figures']
+        )
+        files = [os.path.join(out, FIGURE_DIR, name) for name in os.listdir(os.path.join(out, FIGURE_DIR))]
+        compressed = sum(os.path.getsize(path) for path in files) + os.path.getsize(os.path.join(out, MANIFEST))
+        raw = sum(len(gzip.open(path).read()) for path in files + [os.path.join(out, MANIFEST)])
+
+    print(f"{built[None]:,} combinations, {args.sample} checked against the dashboard's figures")
+    print(f"build: {build_time:.1f} s; unchanged data: {check_time:.2f} s")
+    print(f"figures: {references:,} references stored as {len(files):,} files ({references / len(files):.1f}x deduplicated)")
+    print(f"size: {raw / 2 ** 20:,.1f} MiB as JSON, {compressed / 2 ** 20:,.1f} MiB gzipped")
+
+
+if __name__ == '__main__':
+    main()
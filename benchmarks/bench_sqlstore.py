@@ -0,0 +1,113 @@
+"""Check the SQLite backend against the in-memory dataset and time both.
+
+Every dashboard filter combination is compared for one walker: KPIs,
+per-dimension averages, the selected days, the rolling trends, the
+calendar of the first selected month and the goal what-if sweep. The
+database also holds ``--users`` other walkers, as a shared file would.
+Timings are cold (no KPI cache) per filter combination.
+
+    python benchmarks/bench_sqlstore.py --days 3650 --users 50
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bench_pipeline import make_records
+
+from step_dashboard.calendar_grid import calendar_grid
+from step_dashboard.dataset import StepDataset
+from step_dashboard.derive import derive_columns
+from step_dashboard.report import DEFAULT_GOAL, filter_combinations
+from step_dashboard.sqlstore import SqlDataset, SqlStore, write_steps
+from step_dashboard.whatif import candidate_goals
+
+USER = 'walker00000'
+
+
+def derived(days, seed):
+    # One record per day, as in a real export
+    records = make_records(days, seed=seed, days=days).drop_duplicates('Date')
+    return derive_columns(records.reset_index(drop=True))[0]
+
+
+def check(memory, sql, filters):
+    expected = memory.kpi_engine.compute(filters, DEFAULT_GOAL)
+    actual = sql.kpi_engine.compute(filters, DEFAULT_GOAL)
+    for field, value in vars(expected).items():
+        if isinstance(value, float):
+            assert np.isclose(value, getattr(actual, field), rtol=1e-12), (filters, field)
+        else:
+            assert value == getattr(actual, field), (filters, field, value, getattr(actual, field))
+
+    expected_averages, actual_averages = memory.rollup.averages(*filters), sql.rollup.averages(*filters)
+    for name in ('day_of_week', 'location', 'temp_bin'):
+        pd.testing.assert_series_equal(
+            getattr(actual_averages, name), getattr(expected_averages, name).rename(index=str),
+            check_index_type=False, check_categorical=False,
+        )
+
+    rows = sql.filter_index.select(*filters)
+    expected_rows = memory.filter_index.select(*filters)
+    np.testing.assert_array_equal(rows['Date'].to_numpy(), expected_rows['Date'].to_numpy())
+    np.testing.assert_array_equal(rows['Step Count'].to_numpy(), expected_rows['Step Count'].to_numpy())
+    pd.testing.assert_frame_equal(sql.trends_for(DEFAULT_GOAL, *filters), memory.trends_for(DEFAULT_GOAL, *filters))
+
+    months = sql.calendar_months(*filters)
+    assert months == memory.calendar_months(*filters), filters
+    year, month = map(int, months[0].split('-'))
+    pd.testing.assert_frame_equal(
+        calendar_grid(sql.calendar_rows(year, month, *filters), year, month, DEFAULT_GOAL),
+        calendar_grid(memory.calendar_rows(year, month, *filters), year, month, DEFAULT_GOAL),
+    )
+    goals = candidate_goals()
+    pd.testing.assert_frame_equal(sql.goal_sweep(goals, *filters), memory.goal_sweep(goals, *filters))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--days', type=int, default=3650)
+    parser.add_argument('--users', type=int, default=50)
+    args = parser.parse_args()
+
+    df = derived(args.days, seed=0)
+    memory = StepDataset(df.copy())
+
+    with tempfile.TemporaryDirectory() as workdir:
+        path = os.path.join(workdir, 'steps.db')
+        start = time.perf_counter()
+        write_steps(df, path, USER)
+        for seed in range(1, args.users + 1):
+            write_steps(derived(args.days, seed), path, f"walker{seed:05d}")
+        load_time = time.perf_counter() - start
+        sql = SqlDataset(SqlStore(path), USER)
+
+        combinations = list(filter_combinations(memory, df['Date'].iloc[100], df['Date'].iloc[-100]))
+        combinations = [filters for filters in combinations if len(memory.filter_index.positions(*filters))]
+        for filters in combinations:
+            check(memory, sql, filters)
+
+        timings = {}
+        for name, dataset in [('pandas', memory), ('sqlite', sql)]:
+            start = time.perf_counter()
+            for filters in combinations:
+                dataset.kpi_engine.compute(filters, DEFAULT_GOAL)
+                dataset.rollup.averages(*filters)
+            timings[name] = (time.perf_counter() - start) / len(combinations)
+        size = os.path.getsize(path)
+
+    print(f"{len(combinations):,} filter combinations match; {len(df):,} days per walker, {args.users + 1} walkers")
+    print(f"database: {size / 2 ** 20:,.1f} MiB, written in {load_time:.2f} s")
+    print(f"in-memory dataset:   {df.memory_usage(deep=True).sum() / 2 ** 20:,.2f} MiB held per walker")
+    print(f"pandas KPIs + bars:  {timings['pandas'] * 1000:8.3f} ms per combination")
+    print(f"SQLite KPIs + bars:  {timings['sqlite'] * 1000:8.3f} ms per combination")
+
+
+if __name__ == '__main__':
+    main()
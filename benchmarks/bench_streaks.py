@@ -0,0 +1,109 @@
+"""Check the run-length streak engine against a reference loop and time both.
+
+Random goal sequences, with and without calendar gaps and user groups, are
+compared against a plain Python loop before timing.
+
+    python benchmarks/bench_streaks.py --rows 5000000
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from step_dashboard.streaks import streak_runs, summarize_streaks
+
+
+def reference_runs(dates, met_goal, calendar_aware=False, groups=None):
+    runs = []
+    start = None
+    for i, met in enumerate(met_goal):
+        joined = i > 0
+        if joined and calendar_aware:
+            joined = dates[i] - dates[i - 1] == pd.Timedelta(days=1)
+        if joined and groups is not None:
+            joined = groups[i] == groups[i - 1]
+
+        if start is not None and not (met and joined):
+            runs.append((start, i - 1))
+            start = None
+        if met and start is None:
+            start = i
+    if start is not None:
+        runs.append((start, len(met_goal) - 1))
+    return runs
+
+
+def reference_longest(met_goal):
+    highest_streak = 0
+    current_streak_count = 0
+    for met in met_goal:
+        if met:
+            current_streak_count += 1
+            highest_streak = max(highest_streak, current_streak_count)
+        else:
+            current_streak_count = 0
+    return highest_streak
+
+
+def random_case(rng, rows):
+    gaps = rng.choice([1, 1, 1, 2, 3], size=rows)
+    dates = pd.Timestamp('2024-01-01') + pd.to_timedelta(np.cumsum(gaps), unit='D')
+    met = rng.random(rows) < rng.uniform(0.1, 0.9)
+    groups = np.sort(rng.integers(0, 4, rows))
+    return dates, met, groups
+
+
+def check_properties(cases, seed=0):
+    rng = np.random.default_rng(seed)
+    for _ in range(cases):
+        dates, met, groups = random_case(rng, int(rng.integers(0, 60)))
+        for calendar_aware in (False, True):
+            for group in (None, groups):
+                runs = streak_runs(dates, met, calendar_aware, group)
+                expected = reference_runs(dates, met, calendar_aware, group)
+                actual = list(zip(runs['start'], runs['end']))
+                assert actual == [(dates[s], dates[e]) for s, e in expected], (met, calendar_aware)
+                assert runs['length'].sum() == met.sum()
+
+        summary = summarize_streaks(dates, met)
+        assert summary.longest == reference_longest(met.tolist())
+        tail = len(met) - np.flatnonzero(~met)[-1] - 1 if (~met).any() else len(met)
+        assert summary.current == tail
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, default=5_000_000)
+    parser.add_argument('--cases', type=int, default=500)
+    args = parser.parse_args()
+
+    check_properties(args.cases)
+
+    rng = np.random.default_rng(1)
+    dates, met, groups = random_case(rng, args.rows)
+
+    start = time.perf_counter()
+    reference_longest(met.tolist())
+    loop_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    summarize_streaks(dates, met)
+    rle_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    streak_runs(dates, met, calendar_aware=True, groups=groups)
+    calendar_time = time.perf_counter() - start
+
+    print(f"property cases: {args.cases}, rows timed: {args.rows:,}")
+    print(f"python loop:           {loop_time:8.3f} s")
+    print(f"run-length encoding:   {rle_time:8.3f} s  ({loop_time / rle_time:.1f}x)")
+    print(f"calendar-aware, users: {calendar_time:8.3f} s")
+
+
+if __name__ == '__main__':
+    main()
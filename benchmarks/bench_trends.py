@@ -0,0 +1,84 @@
+"""Check RollingTrends against pandas time-based rolling windows and time both.
+
+Also checks that appending days in batches gives the same frame as
+building the trends over the full history at once.
+
+    python benchmarks/bench_trends.py --days 3650
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from step_dashboard.trends import WINDOWS, RollingTrends
+
+GOAL = 11000
+
+
+def trends_with_rolling(dates, steps, goal):
+    records = pd.DataFrame({'steps': steps, 'met': (steps >= goal) * 100.0}, index=pd.DatetimeIndex(dates))
+    grid = pd.date_range(records.index.min(), records.index.max(), freq='D', name='Date')
+    daily = records.groupby(level=0).agg(['sum', 'count']).reindex(grid, fill_value=0)
+    expected = pd.DataFrame(index=grid)
+    expected['steps'] = (daily[('steps', 'sum')] / daily[('steps', 'count')]).where(daily[('steps', 'count')] > 0)
+    for window in WINDOWS:
+        sums = daily.rolling(f'{window}D').sum()
+        count = sums[('steps', 'count')]
+        expected[f'mean_{window}d'] = (sums[('steps', 'sum')] / count).where(count > 0)
+        expected[f'goal_rate_{window}d'] = (sums[('met', 'sum')] / count).where(count > 0)
+    expected['wow_delta'] = expected['mean_7d'] - expected['mean_7d'].shift(7)
+    return expected
+
+
+def make_days(days, seed=0, missing=0.2):
+    rng = np.random.default_rng(seed)
+    dates = pd.Timestamp('2015-01-01') + pd.to_timedelta(np.arange(days), unit='D')
+    dates = dates[rng.random(days) >= missing]
+    return dates.to_numpy(), rng.integers(500, 25000, len(dates))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--days', type=int, default=3650)
+    parser.add_argument('--batches', type=int, default=20)
+    args = parser.parse_args()
+
+    dates, steps = make_days(args.days)
+
+    start = time.perf_counter()
+    expected = trends_with_rolling(dates, steps, GOAL)
+    rolling_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    trends = RollingTrends(dates, steps, GOAL)
+    cumsum_time = time.perf_counter() - start
+    pd.testing.assert_frame_equal(trends.frame, expected, check_freq=False, check_names=False)
+
+    # Append in batches; the last batch starts on an already-seen day
+    cut = np.linspace(0, len(dates), args.batches + 1).astype(int)
+    appended = RollingTrends(dates[:cut[1]], steps[:cut[1]], GOAL)
+    append_times = []
+    for lo, hi in zip(cut[1:-1], cut[2:]):
+        start = time.perf_counter()
+        appended = appended.appended(dates[lo:hi], steps[lo:hi])
+        append_times.append(time.perf_counter() - start)
+    extra = appended.appended(dates[-1:], steps[-1:])
+    pd.testing.assert_frame_equal(appended.frame, trends.frame, check_freq=False)
+    pd.testing.assert_frame_equal(
+        extra.frame, RollingTrends(np.append(dates, dates[-1]), np.append(steps, steps[-1]), GOAL).frame,
+        check_freq=False,
+    )
+
+    print(f"days: {args.days:,}, records: {len(dates):,}")
+    print(f"pandas rolling:   {rolling_time * 1000:8.2f} ms")
+    print(f"cumulative sums:  {cumsum_time * 1000:8.2f} ms  ({rolling_time / cumsum_time:.1f}x)")
+    print(f"append one batch: {np.mean(append_times) * 1000:8.2f} ms  ({len(dates) // args.batches:,} records)")
+
+
+if __name__ == '__main__':
+    main()
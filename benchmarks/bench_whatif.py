@@ -0,0 +1,69 @@
+"""Check the goal sweep against one KPI computation per goal and time both.
+
+The per-goal loop is what rerunning the dashboard once per candidate goal
+computes: the goal rate, the calendar-aware streak and the calendar's
+met/close/missed split.
+
+    python benchmarks/bench_whatif.py --days 100 3650 36500
+"""
+import argparse
+import os
+import sys
+import time
+
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bench_pipeline import make_records
+
+from step_dashboard.calendar_grid import CLOSE_RATIO
+from step_dashboard.streaks import summarize_streaks
+from step_dashboard.whatif import candidate_goals, sweep_goals
+
+
+def sweep_per_goal(dates, steps, goals):
+    rows = []
+    for goal in goals:
+        met = steps >= goal
+        close = ~met & (steps >= goal * CLOSE_RATIO)
+        rows.append({
+            'goal_pct': met.sum() / len(steps) * 100,
+            'longest_streak': summarize_streaks(dates, met, calendar_aware=True).longest,
+            'met': met.sum(),
+            'close': close.sum(),
+            'missed': (~met & ~close).sum(),
+        })
+    return pd.DataFrame(rows, index=pd.Index(goals, name='goal'))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--days', type=int, nargs='+', default=[100, 3650, 36500])
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    goals = candidate_goals()
+    for days in args.days:
+        # One record per day, with gaps where a date was drawn twice
+        records = make_records(days, days=days).drop_duplicates('Date')
+        dates, steps = records['Date'].to_numpy(), records['Step Count'].to_numpy()
+
+        start = time.perf_counter()
+        for _ in range(args.repeat):
+            expected = sweep_per_goal(dates, steps, goals)
+        loop_time = (time.perf_counter() - start) / args.repeat
+
+        start = time.perf_counter()
+        for _ in range(args.repeat):
+            sweep = sweep_goals(dates, steps, goals)
+        sweep_time = (time.perf_counter() - start) / args.repeat
+        pd.testing.assert_frame_equal(sweep, expected, check_dtype=False)
+
+        print(f"{len(steps):,} days, {len(goals)} goals")
+        print(f"  one computation per goal: {loop_time * 1000:8.2f} ms")
+        print(f"  sweep:                    {sweep_time * 1000:8.2f} ms  ({loop_time / sweep_time:.1f}x)")
+
+
+if __name__ == '__main__':
+    main()
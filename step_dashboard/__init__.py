@@ -0,0 +1 @@
+"""Data and computation helpers used by the step count dashboard."""
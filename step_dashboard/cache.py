@@ -0,0 +1,117 @@
+"""Small in-process caches shared by every dashboard session."""
+import json
+import threading
+import time
+from collections import OrderedDict, namedtuple
+
+import pandas as pd
+
+CacheInfo = namedtuple('CacheInfo', ['hits', 'misses', 'maxsize', 'currsize'])
+
+
+class LRUCache:
+    """Thread-safe bounded mapping that evicts the least recently used key."""
+
+    def __init__(self, maxsize=256):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get_or_compute(self, key, compute):
+        with self._lock:
+            if key in self._data:
+                self.hits += 1
+                self._data.move_to_end(key)
+                return self._data[key]
+            self.misses += 1
+
+        # Computed outside the lock so one slow miss does not block other sessions
+        value = compute()
+
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def cache_info(self):
+        with self._lock:
+            return CacheInfo(self.hits, self.misses, self.maxsize, len(self._data))
+
+
+def dataset_fingerprint(df, previous=None):
+    """Content hash of a frame, stable across processes for identical data.
+
+    Row hashes are summed, so the fingerprint of appended rows can be
+    combined with the ``previous`` fingerprint without rehashing old rows.
+    """
+    hashes = pd.util.hash_pandas_object(df, index=False).to_numpy()
+    rows = len(df)
+    total = int(hashes.sum(dtype='uint64'))
+    if previous is not None:
+        previous_rows, previous_total = (int(part, 16) for part in previous.split('-'))
+        rows += previous_rows
+        total = (total + previous_total) % (1 << 64)
+    return f"{rows:x}-{total:016x}"
+
+
+class FigureCache:
+    """Serialized Plotly figures keyed on (dataset, chart id, chart inputs).
+
+    Figures are stored as JSON so a cached entry can never be mutated by the
+    session that reads it. Build times are recorded per chart id.
+    """
+
+    def __init__(self, fingerprint, maxsize=512):
+        self.fingerprint = fingerprint
+        self.cache = LRUCache(maxsize)
+        self._stats = {}
+        self._lock = threading.Lock()
+
+    def _record(self, chart_id, built, seconds=0.0):
+        with self._lock:
+            stats = self._stats.setdefault(chart_id, {'builds': 0, 'hits': 0, 'build_s': 0.0, 'last_build_s': 0.0})
+            if built:
+                stats['builds'] += 1
+                stats['build_s'] += seconds
+                stats['last_build_s'] = seconds
+            else:
+                stats['hits'] += 1
+
+    def figure(self, chart_id, key, build):
+        """The figure dict for ``chart_id`` and ``key``, calling ``build()`` on a miss."""
+        built = []
+
+        def compute():
+            start = time.perf_counter()
+            payload = build().to_json()
+            built.append(time.perf_counter() - start)
+            return payload
+
+        payload = self.cache.get_or_compute((self.fingerprint, chart_id) + tuple(key), compute)
+        self._record(chart_id, bool(built), built[0] if built else 0.0)
+        return json.loads(payload)
+
+    def timings(self):
+        """Per-chart builds, cache hits and build times in milliseconds."""
+        with self._lock:
+            rows = [
+                {
+                    'chart': chart_id,
+                    'builds': stats['builds'],
+                    'hits': stats['hits'],
+                    'last_build_ms': stats['last_build_s'] * 1000,
+                    'mean_build_ms': stats['build_s'] * 1000 / stats['builds'] if stats['builds'] else 0.0,
+                }
+                for chart_id, stats in self._stats.items()
+            ]
+        return pd.DataFrame(rows, columns=['chart', 'builds', 'hits', 'last_build_ms', 'mean_build_ms'])
@@ -0,0 +1,93 @@
+"""Marker arrays for the calendar view, built by joining the data onto a date grid.
+
+Every day of the requested month (or year) is a row of the grid. The step
+records are joined onto it in one reindex, and positions, colors, sizes and
+hover texts are computed as columns instead of one day at a time.
+"""
+import numpy as np
+import pandas as pd
+
+MONTH_NAMES = ['January', 'February', 'March', 'April', 'May', 'June',
+               'July', 'August', 'September', 'October', 'November', 'December']
+
+MET_COLOR = '#10b981'
+CLOSE_COLOR = '#f59e0b'
+MISSED_COLOR = '#ef4444'
+NO_DATA_COLOR = '#e2e8f0'
+NO_DATA_SIZE = 35
+# Days at or above this share of the goal are "close" (amber)
+CLOSE_RATIO = 0.8
+
+
+def format_thousands(values):
+    """Integers as strings with comma thousands separators, e.g. 12345 -> "12,345"."""
+    return pd.Series(np.asarray(values, dtype='int64')).astype(str).str.replace(
+        r'\B(?=(\d{3})+$)', ',', regex=True
+    )
+
+
+def weeks_in_month(year, month):
+    first = pd.Timestamp(year, month, 1)
+    return (first.dayofweek + first.days_in_month + 6) // 7
+
+
+def calendar_grid(df, year, month=None, goal=11000, close_ratio=CLOSE_RATIO):
+    """One row per calendar day of ``month`` (or every month of ``year``).
+
+    Columns: year, month, day, x (weekday), y (week row, top row highest),
+    weeks (rows in that month's calendar), has_data, steps, color, size
+    and hover. The first record of a date is used when there are several.
+    """
+    start = pd.Timestamp(year, month or 1, 1)
+    end = pd.Timestamp(year, month or 12, 1) + pd.offsets.MonthEnd(0)
+    dates = pd.date_range(start, end, freq='D')
+
+    in_range = df[(df['Date'] >= start) & (df['Date'] <= end)]
+    days = (
+        in_range.drop_duplicates('Date')
+        .set_index('Date')[['Step Count', 'Location', 'Temperature']]
+        .reindex(dates)
+    )
+
+    day = dates.day.to_numpy()
+    first_weekday = (dates - pd.to_timedelta(day - 1, unit='D')).dayofweek.to_numpy()
+    days_in_month = dates.days_in_month.to_numpy()
+    weeks = (first_weekday + days_in_month + 6) // 7
+    week_idx = (day + first_weekday - 1) // 7
+
+    has_data = days['Step Count'].notna().to_numpy()
+    steps = days['Step Count'].fillna(0).to_numpy(dtype='int64')
+    met = has_data & (steps >= goal)
+    close = has_data & ~met & (steps >= goal * close_ratio)
+    missed = has_data & ~met & ~close
+
+    color = np.select([met, close, missed], [MET_COLOR, CLOSE_COLOR, MISSED_COLOR], NO_DATA_COLOR)
+    status = np.select([met, close], ['✅ Goal Met', '⚠️ Close'], '❌ Missed')
+    size = np.where(has_data, 30 + np.minimum(steps / goal, 1.5) * 25, NO_DATA_SIZE)
+
+    months = dates.month.to_numpy()
+    title = (
+        '<b>' + pd.Series(np.array(MONTH_NAMES)[months - 1]) + ' ' + pd.Series(day).astype(str)
+        + ', ' + str(year) + '</b><br>'
+    )
+    detail = (
+        '🚶 Steps: ' + format_thousands(steps)
+        + '<br>📍 Location: ' + days['Location'].astype(object).fillna('').astype(str).reset_index(drop=True)
+        + '<br>🌡️ Temperature: ' + days['Temperature'].astype(object).fillna('').astype(str).reset_index(drop=True)
+        + '<br> Status: ' + pd.Series(status)
+    )
+    hover = np.where(has_data, title + detail, title + 'No data')
+
+    return pd.DataFrame({
+        'year': year,
+        'month': months,
+        'day': day,
+        'x': dates.dayofweek.to_numpy(),
+        'y': weeks - week_idx - 1,
+        'weeks': weeks,
+        'has_data': has_data,
+        'steps': steps,
+        'color': color,
+        'size': size,
+        'hover': hover,
+    })
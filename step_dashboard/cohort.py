@@ -0,0 +1,156 @@
+"""The dashboard KPIs for a whole cohort of walkers at once.
+
+All users' records are stacked into one frame with a ``User`` column and
+every KPI is a grouped operation over it: means and goal rates with
+``groupby``, per-dimension averages as a users x values table whose row-wise
+``idxmax`` gives the most active day, location and temperature range, and
+streaks from one run-length encoding with the user as the group. Users are
+independent, so a large cohort is split into chunks that load and compute
+in a process pool and are concatenated afterwards.
+"""
+import multiprocessing
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from .derive import TEMP_LABELS, derive_columns
+from .filters import ALL_LOCATIONS, ALL_TEMPERATURES, DAY_ORDER
+from .partitions import PartitionedStore
+from .streaks import streak_runs
+
+COHORT_CHUNK = 64
+
+Cohort = namedtuple('Cohort', ['kpis', 'day_of_week', 'location', 'temp_bin'])
+
+
+def load_users(store, users):
+    """Derived records of ``users``, sorted by user and date."""
+    df = store.load_users(users)
+    df['Date'] = pd.to_datetime(df['Date'])
+    df['User'] = pd.Categorical(df['User'], categories=list(users))
+    df = df.sort_values(['User', 'Date'], kind='stable').reset_index(drop=True)
+    return derive_columns(df)[0]
+
+
+def cohort_mask(df, date_range, location, day_type, temp_range, start_date=None, end_date=None):
+    """The dashboard filters over a stacked frame; "Last N Days" counts back from each user's last day."""
+    mask = np.ones(len(df), dtype=bool)
+    if date_range in ('Last 30 Days', 'Last 60 Days'):
+        days = 30 if date_range == 'Last 30 Days' else 60
+        last = df.groupby('User', observed=True)['Date'].transform('max')
+        mask &= (df['Date'] >= last - pd.Timedelta(days=days)).to_numpy()
+    elif date_range == 'Custom Range':
+        mask &= df['Date'].between(pd.to_datetime(start_date), pd.to_datetime(end_date)).to_numpy()
+
+    if location != ALL_LOCATIONS:
+        mask &= (df['Location'] == location).to_numpy()
+    if day_type == 'Weekdays':
+        mask &= (df['Day_Type'] == 'Weekday').to_numpy()
+    elif day_type == 'Weekends':
+        mask &= (df['Day_Type'] == 'Weekend').to_numpy()
+    elif day_type in DAY_ORDER:
+        mask &= (df['Day of week'] == day_type).to_numpy()
+    if temp_range != ALL_TEMPERATURES:
+        mask &= (df['Temp_Bin'] == temp_range).to_numpy()
+    return mask
+
+
+def dimension_table(df, column, order=None):
+    """Mean steps per user (rows) and value of ``column`` (columns); NaN where a user has none."""
+    table = df.groupby(['User', column], observed=True)['Step Count'].mean().unstack(column)
+    table.columns = table.columns.astype(object)
+    if order is None:
+        order = sorted(table.columns)
+    return table.reindex(columns=[value for value in order if value in table.columns])
+
+
+def first_max(table):
+    """Column label of each row's maximum (the first on ties), NaN for rows without data."""
+    values = table.to_numpy(dtype='float64')
+    has_data = ~np.isnan(values).all(axis=1)
+    best = np.full(len(table), np.nan, dtype=object)
+    best[has_data] = np.asarray(table.columns, dtype=object)[np.nanargmax(values[has_data], axis=1)]
+    return pd.Series(best, index=table.index)
+
+
+def cohort_kpis(df, goal):
+    """One row per user with the eight dashboard KPIs, plus the number of days."""
+    users = df['User'].cat.categories
+    steps = df.groupby('User', observed=False)['Step Count']
+    met = df['Step Count'] >= goal
+
+    runs = streak_runs(df['Date'], met, calendar_aware=True, groups=df['User'].cat.codes)
+    longest = runs.groupby('group')['length'].max()
+    streak = pd.Series(longest.reindex(np.arange(len(users)), fill_value=0).to_numpy(), index=users)
+
+    kpis = pd.DataFrame({
+        'days': steps.size(),
+        'avg_steps': steps.mean(),
+        'goal_pct': met.groupby(df['User'], observed=False).mean() * 100,
+        'max_steps': steps.max(),
+        'min_steps': steps.min(),
+    })
+    kpis['most_active_day'] = first_max(dimension_table(df, 'Day of week', DAY_ORDER)).reindex(users)
+    kpis['most_active_location'] = first_max(dimension_table(df, 'Location')).reindex(users)
+    kpis['best_temp'] = first_max(dimension_table(df, 'Temp_Bin', TEMP_LABELS)).reindex(users)
+    kpis['highest_streak'] = streak
+    kpis.index.name = 'User'
+    return kpis
+
+
+def compute_cohort(df, goal):
+    return Cohort(
+        kpis=cohort_kpis(df, goal),
+        day_of_week=dimension_table(df, 'Day of week', DAY_ORDER).reindex(df['User'].cat.categories),
+        location=dimension_table(df, 'Location').reindex(df['User'].cat.categories),
+        temp_bin=dimension_table(df, 'Temp_Bin', TEMP_LABELS).reindex(df['User'].cat.categories),
+    )
+
+
+def cohort_chunk(task):
+    """Load and compute one chunk of users; runs in a worker process."""
+    root, users, filters, goal = task
+    df = load_users(PartitionedStore(root), users)
+    selected = df[cohort_mask(df, *filters)]
+    return compute_cohort(selected, goal)
+
+
+def combine(cohorts):
+    def stack(tables, order=None):
+        table = pd.concat(tables)
+        columns = order if order is not None else sorted(table.columns)
+        return table.reindex(columns=[value for value in columns if value in table.columns])
+
+    return Cohort(
+        kpis=pd.concat([cohort.kpis for cohort in cohorts]),
+        day_of_week=stack([cohort.day_of_week for cohort in cohorts], DAY_ORDER),
+        location=stack([cohort.location for cohort in cohorts]),
+        temp_bin=stack([cohort.temp_bin for cohort in cohorts], TEMP_LABELS),
+    )
+
+
+def compare_cohort(root, users, filters, goal, workers=None, chunk_size=COHORT_CHUNK):
+    """KPIs and per-dimension averages of ``users`` from the partition store at ``root``."""
+    users = list(users)
+    tasks = [(root, users[i:i + chunk_size], tuple(filters), goal) for i in range(0, len(users), chunk_size)]
+    if len(tasks) == 1:
+        return cohort_chunk(tasks[0])
+    # Spawned workers: the dashboard process has threads, which fork does not copy safely
+    with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn')) as pool:
+        return combine(list(pool.map(cohort_chunk, tasks)))
+
+
+def percentile_rank(table, user):
+    """Percent of the cohort at or below ``user`` in each column (NaN where the user has no data)."""
+    return table.rank(pct=True, method='max').loc[user] * 100
+
+
+def comparison_table(table, user):
+    """One row per value of a dimension: the user's average, the team's, and the user's percentile."""
+    return pd.DataFrame({
+        'Me': table.loc[user],
+        'Team': table.mean(),
+        'My percentile': percentile_rank(table, user),
+    }).rename_axis(table.columns.name)
@@ -0,0 +1,169 @@
+"""A derived step dataset together with the indexes and caches built on it."""
+import threading
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from .cache import FigureCache, dataset_fingerprint
+from .derive import derive_columns
+from .filters import FilterIndex
+from .kpis import KpiEngine
+from .rollup import RollupCube
+from .trends import RollingTrends
+from .whatif import sweep_goals
+
+
+# Selections of the shared frame are views of its memory. pandas 3 always
+# copies them on write; pandas 2.2 does so only with this option.
+if int(pd.__version__.split('.')[0]) < 3:
+    pd.set_option('mode.copy_on_write', True)
+
+
+def refuse_write(*args, **kwargs):
+    raise TypeError("The shared step dataset is read-only; select rows or .copy() it first")
+
+
+def read_only_indexer(name):
+    """A ``.loc``-style property (``name`` is loc, iloc, at or iat) that refuses item assignment."""
+    indexer = type(getattr(pd.DataFrame(), name))
+    refusing = type(f"ReadOnly{indexer.__name__}", (indexer,), {'__setitem__': refuse_write})
+    return property(lambda self: refusing(name, self))
+
+
+class ReadOnlyFrame(pd.DataFrame):
+    """A DataFrame over read-only arrays that refuses every write.
+
+    Shared by every session, so assigning through ``[]``, ``.loc``,
+    ``.iloc``, ``.at``, ``.iat`` or an attribute, inserting or deleting a
+    column and ``inplace=True`` methods all raise TypeError. The arrays themselves are
+    read-only as well. Refusing the writes up front matters: under
+    copy-on-write, while a selection still references a column, pandas
+    copies that column and writes the copy into this frame, so numpy's flag
+    alone would not stop it. Selections and other derived frames are plain
+    DataFrames: with copy-on-write they share memory until they are written.
+    """
+
+    @property
+    def _constructor(self):
+        return pd.DataFrame
+
+    def __setattr__(self, name, value):
+        # pandas keeps its own state in underscore attributes; anything else
+        # would shadow a column (df.Avg_Temp = ...) for every session
+        if not name.startswith('_'):
+            refuse_write()
+        super().__setattr__(name, value)
+
+    __setitem__ = __delitem__ = insert = pop = isetitem = _set_value = refuse_write
+    # Every inplace=True method (sort_values, drop, fillna, ...) ends in
+    # _update_inplace; rename and reset_index set the axes directly
+    _update_inplace = _set_axis = refuse_write
+    loc = read_only_indexer('loc')
+    iloc = read_only_indexer('iloc')
+    at = read_only_indexer('at')
+    iat = read_only_indexer('iat')
+
+
+def frozen(values):
+    """A read-only view of the numpy array ``values``."""
+    values = values.view()
+    values.flags.writeable = False
+    return values
+
+
+def read_only(df):
+    """``df`` as a ReadOnlyFrame over the same memory (no column is copied)."""
+    columns = {}
+    for column in df.columns:
+        values = df[column]
+        if isinstance(values.dtype, pd.CategoricalDtype):
+            columns[column] = pd.Categorical.from_codes(frozen(values.array.codes), dtype=values.dtype)
+        elif isinstance(values.dtype, np.dtype):
+            columns[column] = frozen(values.to_numpy())
+        else:
+            # Arrow-backed and other extension arrays are immutable already
+            columns[column] = values.array
+    return ReadOnlyFrame(columns, index=df.index, copy=False)
+
+
+class StepDataset:
+    """Immutable snapshot: the frame, its filter index, rollup cube, KPI engine and figure cache.
+
+    Appending rows returns a new snapshot, so a rerun that already holds one
+    never sees a half-updated dataset. The frame is read-only, see
+    ReadOnlyFrame. ``as_of`` is when the snapshot was built.
+    """
+
+    def __init__(self, df, temp_issues=None, filter_index=None, rollup=None, fingerprint=None):
+        self.temp_issues = temp_issues if temp_issues is not None else df.iloc[:0][['Date', 'Temperature']]
+        self.filter_index = filter_index or FilterIndex(df)
+        self.filter_index.df = self.df = read_only(self.filter_index.df)
+        self.rollup = rollup or RollupCube(df)
+        self.kpi_engine = KpiEngine(self.filter_index, self.rollup)
+        self.figure_cache = FigureCache(fingerprint or dataset_fingerprint(df))
+        self._trends = {}
+        self._trends_lock = threading.Lock()
+        self.as_of = datetime.now()
+
+    @property
+    def last_date(self):
+        return self.df['Date'].max() if len(self.df) else None
+
+    def trends(self, goal):
+        """Rolling trends over every row, built once per goal."""
+        with self._trends_lock:
+            if goal not in self._trends:
+                self._trends[goal] = RollingTrends(self.df['Date'], self.df['Step Count'], goal)
+            return self._trends[goal]
+
+    def trends_for(self, goal, date_range, location, day_type, temp_range, start_date=None, end_date=None):
+        """Trends for a filter combination.
+
+        With only a date filter this is the shared trends clipped to the
+        range, so windows at its start still look back into earlier days.
+        Category filters get trends over just the selected rows.
+        """
+        if self.filter_index.bitmaps(location, day_type, temp_range):
+            rows = self.filter_index.select(date_range, location, day_type, temp_range, start_date, end_date)
+            return RollingTrends(rows['Date'], rows['Step Count'], goal).frame
+        lo, hi = self.filter_index.date_slice(date_range, start_date, end_date)
+        if lo == hi:
+            return self.trends(goal).frame.iloc[:0]
+        return self.trends(goal).between(self.filter_index.dates[lo], self.filter_index.dates[hi - 1])
+
+    def calendar_months(self, *filters):
+        """'YYYY-MM' of every month with a selected row, in order."""
+        return self.filter_index.select(*filters)['Date'].dt.strftime('%Y-%m').unique().tolist()
+
+    def calendar_rows(self, year, month, *filters):
+        """Selected rows for the calendar of ``month``; calendar_grid keeps just that month."""
+        return self.filter_index.select(*filters)
+
+    def goal_sweep(self, goals, *filters):
+        """whatif.sweep_goals over the selected rows."""
+        rows = self.filter_index.select(*filters)
+        return sweep_goals(rows['Date'], rows['Step Count'], goals)
+
+    def appended(self, raw_rows):
+        """A new snapshot with ``raw_rows`` derived and merged in.
+
+        Only the new rows are derived. The filter index, rollup cube and any
+        rolling trends are extended rather than rebuilt, and KPI and figure
+        caches start empty.
+        """
+        new_df, new_issues = derive_columns(raw_rows.sort_values('Date'))
+        new_df.index = pd.RangeIndex(len(self.df), len(self.df) + len(new_df))
+        filter_index = self.filter_index.appended(new_df)
+        dataset = StepDataset(
+            filter_index.df,
+            pd.concat([self.temp_issues, new_issues], ignore_index=True),
+            filter_index=filter_index,
+            rollup=self.rollup.appended(new_df),
+            fingerprint=dataset_fingerprint(new_df, previous=self.figure_cache.fingerprint),
+        )
+        with self._trends_lock:
+            trends = dict(self._trends)
+        for goal, goal_trends in trends.items():
+            dataset._trends[goal] = goal_trends.appended(new_df['Date'], new_df['Step Count'])
+        return dataset
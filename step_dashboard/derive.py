@@ -0,0 +1,103 @@
+"""Derived columns computed once after the raw step records are read."""
+import numpy as np
+import pandas as pd
+
+TEMP_BINS = [0, 10, 15, 20, 25, 30, 35, 100]
+TEMP_LABELS = ['<10°C', '10-15°C', '15-20°C', '20-25°C', '25-30°C', '30-35°C', '35+°C']
+WEEKEND_DAYS = ['Saturday', 'Sunday']
+DAY_ORDER = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
+DAY_TYPE_LABELS = ['Weekday', 'Weekend']
+
+# Label columns repeat a handful of values, so they are stored dictionary-encoded
+CATEGORY_COLUMNS = ['Location', 'Activity', 'Temperature']
+
+# Accepts both "20ºC-34ºC" and "15-20ºC", with º or ° as the degree sign
+TEMP_PATTERN = r'^\s*(-?\d+)\s*(?:[º°]\s*C)?\s*-\s*(-?\d+)\s*(?:[º°]\s*C)?\s*$'
+
+
+def parse_temperatures(temperature):
+    """Return the midpoint of each "min-max" range and a mask of unparsable values.
+
+    Exports repeat a small set of range strings, so the regex runs once per
+    distinct string and the results are broadcast back with the factor codes.
+    """
+    codes, uniques = pd.factorize(temperature)
+    bounds = pd.Series(uniques, dtype='string').str.extract(TEMP_PATTERN)
+    low = pd.to_numeric(bounds[0], errors='coerce').to_numpy(dtype='float64')
+    high = pd.to_numeric(bounds[1], errors='coerce').to_numpy(dtype='float64')
+    # Missing values get code -1, which lands on the trailing NaN
+    unique_avg = np.append((low + high) / 2, np.nan)
+    avg_temp = pd.Series(unique_avg[codes], index=temperature.index)
+    return avg_temp, avg_temp.isna()
+
+
+def derive_columns(df):
+    """Add Avg_Temp, Temp_Bin and Day_Type.
+
+    Returns the frame and a validation report listing the rows whose
+    Temperature could not be parsed. Those rows keep NaN for Avg_Temp and
+    Temp_Bin instead of aborting the load.
+    """
+    avg_temp, malformed = parse_temperatures(df['Temperature'])
+    df['Avg_Temp'] = avg_temp.to_numpy()
+    df['Temp_Bin'] = pd.cut(df['Avg_Temp'], bins=TEMP_BINS, labels=TEMP_LABELS, right=False)
+    df['Day_Type'] = np.where(df['Day of week'].isin(WEEKEND_DAYS), 'Weekend', 'Weekday')
+    df = compact_columns(df)
+
+    report_columns = [column for column in ['Date', 'Temperature'] if column in df.columns]
+    report = df.loc[malformed.to_numpy(), report_columns].reset_index(drop=True)
+    return df, report
+
+
+def compact_columns(df):
+    """Store labels as categoricals and numbers at the smallest exact precision.
+
+    Step counts fit int32 and the temperature midpoints (whole or half
+    degrees) are exact in float32. Columns that are absent are skipped.
+    """
+    for column in CATEGORY_COLUMNS:
+        if column in df.columns:
+            df[column] = df[column].astype('category')
+    if 'Day of week' in df.columns:
+        df['Day of week'] = pd.Categorical(df['Day of week'], categories=DAY_ORDER)
+    if 'Day_Type' in df.columns:
+        df['Day_Type'] = pd.Categorical(df['Day_Type'], categories=DAY_TYPE_LABELS)
+    if 'Step Count' in df.columns and pd.api.types.is_integer_dtype(df['Step Count']):
+        df['Step Count'] = df['Step Count'].astype('int32')
+    if 'Avg_Temp' in df.columns:
+        df['Avg_Temp'] = df['Avg_Temp'].astype('float32')
+    return df
+
+
+def concat_compact(frames):
+    """Concatenate frames, keeping categorical columns categorical.
+
+    ``pd.concat`` falls back to object dtype when the categories differ, as
+    they do when an appended day brings a new location. New categories are
+    added after the existing ones.
+    """
+    frames = [frame for frame in frames if frame is not None]
+    categorical = [
+        column for column in frames[0].columns
+        if isinstance(frames[0][column].dtype, pd.CategoricalDtype)
+        and all(column in frame.columns for frame in frames)
+    ]
+    aligned = [frame.copy(deep=False) for frame in frames]
+    for column in categorical:
+        categories = frames[0][column].cat.categories
+        for frame in frames[1:]:
+            values = frame[column]
+            extra = values.cat.categories if isinstance(values.dtype, pd.CategoricalDtype) else pd.Index(values.dropna().unique())
+            categories = categories.append(extra[~extra.isin(categories)])
+        for frame in aligned:
+            values = frame[column]
+            if isinstance(values.dtype, pd.CategoricalDtype):
+                current = values.cat.categories
+                if current.equals(categories):
+                    continue
+                if categories[:len(current)].equals(current):
+                    # Only new categories at the end: the codes stay valid
+                    frame[column] = values.cat.add_categories(categories[len(current):])
+                    continue
+            frame[column] = pd.Categorical(values, categories=categories, ordered=frames[0][column].cat.ordered)
+    return pd.concat(aligned)
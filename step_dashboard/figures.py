@@ -0,0 +1,354 @@
+"""Plotly figures shown by the dashboard, built from precomputed inputs."""
+import plotly.graph_objects as go
+
+from .calendar_grid import CLOSE_COLOR, MET_COLOR, MISSED_COLOR
+from .filters import DAY_ORDER
+from .timeline import WEBGL_THRESHOLD, timeline_traces
+
+GREEN = '#59cd90'
+RED = '#ee6055'
+AMBER = '#fac05e'
+GOAL_LINE_COLOR = '#3fa7d6'
+TREND_COLORS = {7: '#f29e4c', 30: '#8e6cc7', 90: '#5c677d'}
+
+DAY_LABELS = ['Mon', 'Tue', 'Wed', 'Thu', 'Fri', 'Sat', 'Sun']
+
+
+def legend_marker(color, name, size, showlegend):
+    return go.Scatter(
+        x=[None], y=[None],
+        mode='markers',
+        marker=dict(size=size, color=color),
+        name=name,
+        showlegend=showlegend
+    )
+
+
+def calendar_figure(grid, weeks):
+    """Month calendar from a ``calendar_grid`` frame with ``weeks`` rows."""
+    fig_calendar = go.Figure()
+
+    fig_calendar.add_trace(go.Scatter(
+        x=grid['x'],
+        y=grid['y'],
+        mode='markers+text',
+        marker=dict(
+            size=grid['size'],
+            color=grid['color'],
+            symbol='circle',
+            line=dict(width=2, color='white'),
+            opacity=0.9
+        ),
+        text=grid['day'].astype(str),
+        textfont=dict(size=12, color='white', family='Arial Black'),
+        textposition='middle center',
+        hovertext=grid['hover'],
+        hovertemplate='%{hovertext}<extra></extra>',
+        showlegend=False
+    ))
+
+    for i, day in enumerate(DAY_LABELS):
+        fig_calendar.add_annotation(
+            x=i, y=weeks,
+            text=f"<b>{day}</b>",
+            showarrow=False,
+            font=dict(size=14, color='#64748b'),
+            xanchor='center',
+            yanchor='middle'
+        )
+
+    fig_calendar.add_trace(legend_marker(GREEN, 'Goal Met (≥11k)', 15, True))
+    fig_calendar.add_trace(legend_marker(AMBER, 'Close (≥80%)', 15, True))
+    fig_calendar.add_trace(legend_marker(RED, 'Below Goal', 15, True))
+
+    fig_calendar.update_layout(
+        xaxis=dict(
+            showgrid=False,
+            showticklabels=False,
+            zeroline=False,
+            range=[-0.5, 6.5]
+        ),
+        yaxis=dict(
+            showgrid=False,
+            showticklabels=False,
+            zeroline=False,
+            range=[-0.5, weeks + 0.5]
+        ),
+        height=500,
+        plot_bgcolor='white',
+        hovermode='closest',
+        showlegend=True,
+        legend=dict(
+            orientation="h",
+            yanchor="bottom",
+            y=-0.15,
+            xanchor="center",
+            x=0.5
+        ),
+        margin=dict(l=20, r=20, t=20, b=60)
+    )
+    return fig_calendar
+
+
+def trend_traces(trends):
+    """Rolling-average lines, plus the 30-day goal rate on a right-hand axis (hidden until toggled)."""
+    scatter = go.Scattergl if len(trends) > WEBGL_THRESHOLD else go.Scatter
+    traces = []
+    for window, color in TREND_COLORS.items():
+        extra = {}
+        hovertemplate = f'{window}-day average: %{{y:,.0f}} steps<extra></extra>'
+        if window == 7:
+            extra['customdata'] = trends['wow_delta'].to_numpy()
+            hovertemplate = '7-day average: %{y:,.0f} steps<br>vs previous week: %{customdata:+,.0f}<extra></extra>'
+        traces.append(scatter(
+            x=trends.index,
+            y=trends[f'mean_{window}d'],
+            mode='lines',
+            name=f'{window}-day average',
+            line=dict(color=color, width=2),
+            hovertemplate=hovertemplate,
+            **extra
+        ))
+    traces.append(scatter(
+        x=trends.index,
+        y=trends['goal_rate_30d'],
+        mode='lines',
+        name='30-day goal rate',
+        line=dict(color=GREEN, width=2, dash='dot'),
+        yaxis='y2',
+        visible='legendonly',
+        hovertemplate='30-day goal rate: %{y:.0f}%<extra></extra>'
+    ))
+    return traces
+
+
+def timeline_figure(df_sorted, goal, trends=None):
+    """Activity Timeline for date-sorted rows, with rolling trends overlaid when given.
+
+    The number of plotted points is stored in ``layout.meta.points_shown``
+    so callers can tell when the selection was downsampled.
+    """
+    fig_bubble = go.Figure()
+
+    timeline, points_shown = timeline_traces(df_sorted, goal, GREEN, RED)
+    for trace in timeline:
+        fig_bubble.add_trace(trace)
+
+    # goal line
+    fig_bubble.add_trace(
+        go.Scatter(
+            x=[df_sorted['Date'].min(), df_sorted['Date'].max()],
+            y=[goal, goal],
+            mode='lines',
+            name='Goal (11,000 steps)',
+            line=dict(color=GOAL_LINE_COLOR, width=3, dash='dash'),
+            hovertemplate='Goal: %{y:,.0f} steps<extra></extra>',
+            showlegend=True
+        )
+    )
+
+    if trends is not None and len(trends):
+        for trace in trend_traces(trends):
+            fig_bubble.add_trace(trace)
+        fig_bubble.update_layout(
+            yaxis2=dict(title="Goal Rate (%)", overlaying='y', side='right', range=[0, 100], showgrid=False)
+        )
+
+    fig_bubble.update_layout(
+        xaxis_title="Date",
+        yaxis_title="Step Count",
+        hovermode='closest',
+        height=500,
+        showlegend=True,
+        legend=dict(
+            orientation="h",
+            yanchor="bottom",
+            y=-0.25,
+            xanchor="center",
+            x=0.5
+        ),
+        margin=dict(l=40, r=20, t=20, b=80),
+        meta=dict(points_shown=points_shown)
+    )
+    return fig_bubble
+
+
+def average_bar_figure(averages, goal, xaxis_title):
+    """Bar chart of average steps per category, in the order of ``averages``."""
+    labels = averages.index.tolist()
+    colors = [GREEN if avg >= goal else RED for avg in averages]
+
+    fig = go.Figure()
+
+    fig.add_trace(
+        go.Bar(
+            x=labels,
+            y=averages,
+            marker=dict(color=colors),
+            text=[f'{int(avg):,}' for avg in averages],
+            textposition='outside',
+            hovertemplate='%{x}<br>Average: %{y:,.0f} steps<extra></extra>',
+            name="Average Steps",
+            showlegend=False
+        )
+    )
+
+    fig.add_trace(legend_marker(GREEN, 'Goal Met (≥11k)', 12, False))
+    fig.add_trace(legend_marker(RED, 'Goal Missed (<11k)', 12, False))
+
+    fig.update_layout(
+        xaxis_title=xaxis_title,
+        yaxis_title="Average Step Count",
+        height=500,
+        showlegend=False,
+        shapes=[
+            dict(
+                type='line',
+                x0=-0.7,
+                x1=len(labels) - 0.3,
+                y0=goal - 200,
+                y1=goal - 200,
+                line=dict(color=GOAL_LINE_COLOR, width=2, dash='dash'),
+                xref='x',
+                yref='y'
+            )
+        ]
+    )
+    return fig
+
+
+def day_of_week_figure(day_avg, goal):
+    ordered = day_avg.reindex([day for day in DAY_ORDER if day in day_avg.index])
+    return average_bar_figure(ordered, goal, "Day of Week")
+
+
+def temperature_figure(temp_bin_avg, goal):
+    return average_bar_figure(temp_bin_avg, goal, "Temperature Range")
+
+
+def location_figure(location_avg, goal):
+    return average_bar_figure(location_avg.sort_values(ascending=False), goal, "Location")
+
+
+def hourly_profile_figure(profile):
+    """Bar chart of mean steps per hour of day, with the busiest hour highlighted."""
+    peak = int(profile.idxmax()) if profile.max() > 0 else None
+    colors = [GREEN if hour == peak else GOAL_LINE_COLOR for hour in profile.index]
+
+    fig = go.Figure()
+
+    fig.add_trace(
+        go.Bar(
+            x=[f'{hour:02d}:00' for hour in profile.index],
+            y=profile,
+            marker=dict(color=colors),
+            hovertemplate='%{x}<br>Average: %{y:,.0f} steps<extra></extra>',
+            name="Average Steps",
+            showlegend=False
+        )
+    )
+
+    fig.update_layout(
+        xaxis_title="Hour of Day",
+        yaxis_title="Average Steps per Hour",
+        height=400,
+        showlegend=False
+    )
+    return fig
+
+
+def cohort_goal_figure(goal_pct, mine):
+    """Histogram of the team's goal-hit percentages with the selected walker marked."""
+    fig = go.Figure()
+
+    fig.add_trace(
+        go.Histogram(
+            x=goal_pct.dropna(),
+            xbins=dict(start=0, end=100, size=10),
+            marker=dict(color=GOAL_LINE_COLOR),
+            hovertemplate='%{x}% of days<br>%{y} walkers<extra></extra>',
+            name="Walkers",
+            showlegend=False
+        )
+    )
+
+    fig.update_layout(
+        xaxis_title="% Days Goal Reached",
+        yaxis_title="Walkers",
+        height=400,
+        showlegend=False,
+        bargap=0.05,
+        shapes=[
+            dict(
+                type='line',
+                x0=mine,
+                x1=mine,
+                y0=0,
+                y1=1,
+                line=dict(color=GREEN, width=3),
+                xref='x',
+                yref='paper'
+            )
+        ],
+        annotations=[
+            dict(x=mine, y=1, xref='x', yref='paper', text="You", showarrow=False, yanchor='bottom')
+        ]
+    )
+    return fig
+
+
+def what_if_figure(sweep, goal):
+    """Share of met, close and missed days per candidate goal, with the longest streak on a right-hand axis."""
+    days = sweep[['met', 'close', 'missed']].sum(axis=1)
+    fig = go.Figure()
+
+    for column, name, color in [
+        ('met', 'Goal Met', MET_COLOR),
+        ('close', 'Close', CLOSE_COLOR),
+        ('missed', 'Missed', MISSED_COLOR),
+    ]:
+        fig.add_trace(
+            go.Bar(
+                x=sweep.index,
+                y=sweep[column] / days * 100,
+                customdata=sweep[column],
+                marker=dict(color=color),
+                name=name,
+                hovertemplate=f'Goal %{{x:,}}<br>{name}: %{{y:.1f}}% (%{{customdata}} days)<extra></extra>'
+            )
+        )
+
+    fig.add_trace(
+        go.Scatter(
+            x=sweep.index,
+            y=sweep['longest_streak'],
+            mode='lines+markers',
+            name='Longest streak',
+            line=dict(color=GOAL_LINE_COLOR, width=3),
+            yaxis='y2',
+            hovertemplate='Goal %{x:,}<br>Longest streak: %{y} days<extra></extra>'
+        )
+    )
+
+    fig.update_layout(
+        barmode='stack',
+        xaxis_title="Daily Goal (steps)",
+        yaxis=dict(title="% of Days", range=[0, 100]),
+        yaxis2=dict(title="Longest Streak (days)", overlaying='y', side='right', rangemode='tozero', showgrid=False),
+        height=450,
+        legend=dict(orientation="h", yanchor="bottom", y=-0.3, xanchor="center", x=0.5),
+        margin=dict(l=40, r=40, t=20, b=80),
+        shapes=[
+            dict(
+                type='line',
+                x0=goal,
+                x1=goal,
+                y0=0,
+                y1=1,
+                line=dict(color='#334155', width=2, dash='dash'),
+                xref='x',
+                yref='paper'
+            )
+        ]
+    )
+    return fig
@@ -0,0 +1,132 @@
+"""Row selection for the four dashboard filters without copying the dataset.
+
+The index is built once per dataset. Dates are kept sorted so a date range
+is a contiguous slice found with a binary search, and the categorical
+filters are precomputed boolean bitmaps, one per value. A filter
+combination is the AND of at most three bitmaps over that slice.
+"""
+from datetime import timedelta
+
+import numpy as np
+import pandas as pd
+
+from .derive import DAY_ORDER, concat_compact
+
+DATE_RANGES = ['All Days', 'Last 30 Days', 'Last 60 Days', 'Custom Range']
+DAY_TYPES = ['All Days', 'Weekdays', 'Weekends'] + DAY_ORDER
+ALL_LOCATIONS = 'All Locations'
+ALL_TEMPERATURES = 'All Temperatures'
+
+
+def build_bitmaps(values):
+    categories = pd.Categorical(values)
+    codes = categories.codes
+    return {label: codes == code for code, label in enumerate(categories.categories)}
+
+
+def extend_bitmaps(bitmaps, values, existing_rows):
+    """Bitmaps for ``existing_rows`` rows followed by ``values``, reusing the old ones."""
+    added = build_bitmaps(values)
+    extended = {}
+    for label in set(bitmaps) | set(added):
+        old = bitmaps.get(label)
+        new = added.get(label)
+        extended[label] = np.concatenate([
+            old if old is not None else np.zeros(existing_rows, dtype=bool),
+            new if new is not None else np.zeros(len(values), dtype=bool),
+        ])
+    return extended
+
+
+class FilterIndex:
+    def __init__(self, df):
+        if not df['Date'].is_monotonic_increasing:
+            df = df.sort_values('Date', kind='stable')
+        self.df = df
+        self.dates = df['Date'].to_numpy()
+
+        self.location = build_bitmaps(df['Location'])
+        self.day_of_week = build_bitmaps(df['Day of week'])
+        self.day_type = build_bitmaps(df['Day_Type'])
+        self.temp_bin = build_bitmaps(df['Temp_Bin'])
+
+    def appended(self, new_df):
+        """A new index over these rows followed by ``new_df``.
+
+        The new rows must not be dated before the last indexed row. Existing
+        bitmaps are extended with the new rows instead of being rebuilt.
+        """
+        if not new_df['Date'].is_monotonic_increasing:
+            new_df = new_df.sort_values('Date', kind='stable')
+        if len(self.dates) and len(new_df) and new_df['Date'].iloc[0] < self.dates[-1]:
+            raise ValueError("Appended rows must not be dated before the indexed rows")
+
+        index = FilterIndex.__new__(FilterIndex)
+        index.df = concat_compact([self.df, new_df])
+        index.dates = np.concatenate([self.dates, new_df['Date'].to_numpy()])
+        rows = len(self.dates)
+        index.location = extend_bitmaps(self.location, new_df['Location'], rows)
+        index.day_of_week = extend_bitmaps(self.day_of_week, new_df['Day of week'], rows)
+        index.day_type = extend_bitmaps(self.day_type, new_df['Day_Type'], rows)
+        index.temp_bin = extend_bitmaps(self.temp_bin, new_df['Temp_Bin'], rows)
+        return index
+
+    @property
+    def locations(self):
+        return sorted(self.location)
+
+    def date_slice(self, date_range, start_date=None, end_date=None):
+        if len(self.dates) == 0 or date_range == 'All Days':
+            return 0, len(self.dates)
+
+        if date_range in ('Last 30 Days', 'Last 60 Days'):
+            days = 30 if date_range == 'Last 30 Days' else 60
+            cutoff = self.dates[-1] - np.timedelta64(timedelta(days=days))
+            return int(np.searchsorted(self.dates, cutoff, side='left')), len(self.dates)
+
+        if date_range == 'Custom Range':
+            start = pd.to_datetime(start_date).to_datetime64()
+            end = pd.to_datetime(end_date).to_datetime64()
+            lo = int(np.searchsorted(self.dates, start, side='left'))
+            hi = int(np.searchsorted(self.dates, end, side='right'))
+            return lo, max(lo, hi)
+
+        raise ValueError(f"Unknown date range: {date_range}")
+
+    def bitmaps(self, location, day_type, temp_range):
+        empty = np.zeros(len(self.dates), dtype=bool)
+        selected = []
+
+        if location != ALL_LOCATIONS:
+            selected.append(self.location.get(location, empty))
+
+        if day_type == 'Weekdays':
+            selected.append(self.day_type.get('Weekday', empty))
+        elif day_type == 'Weekends':
+            selected.append(self.day_type.get('Weekend', empty))
+        elif day_type in DAY_ORDER:
+            selected.append(self.day_of_week.get(day_type, empty))
+
+        if temp_range != ALL_TEMPERATURES:
+            selected.append(self.temp_bin.get(temp_range, empty))
+
+        return selected
+
+    def positions(self, date_range, location, day_type, temp_range, start_date=None, end_date=None):
+        """Positional row numbers of ``self.df`` matching the filter combination."""
+        lo, hi = self.date_slice(date_range, start_date, end_date)
+        bitmaps = self.bitmaps(location, day_type, temp_range)
+        if not bitmaps:
+            return np.arange(lo, hi)
+
+        mask = bitmaps[0][lo:hi].copy()
+        for bitmap in bitmaps[1:]:
+            mask &= bitmap[lo:hi]
+        return lo + np.flatnonzero(mask)
+
+    def select(self, *args, **kwargs):
+        """Matching rows in date order; a zero-copy slice when they are contiguous."""
+        positions = self.positions(*args, **kwargs)
+        if len(positions) and positions[-1] - positions[0] + 1 == len(positions):
+            return self.df.iloc[positions[0]:positions[-1] + 1]
+        return self.df.iloc[positions]
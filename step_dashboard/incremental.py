@@ -0,0 +1,207 @@
+"""Appending newly recorded days to a live dataset instead of reloading it.
+
+New records arrive as CSV or JSON files in a drop directory, one or more
+days per file. Each refresh reads only files it has not seen (or that
+changed), keeps the rows dated after the last ingested day, and merges
+them with ``StepDataset.appended``. The work done is proportional to the
+new rows, not to the history.
+
+When the source file itself changes it is reloaded in full. ``LiveDataset.start``
+moves all of this onto a background thread, so a rerun only ever reads the
+last good snapshot and never waits on I/O.
+"""
+import logging
+import os
+import threading
+import time
+import weakref
+
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+RECORD_EXTENSIONS = ('.csv', '.json')
+
+
+def read_record_file(path):
+    if path.endswith('.json'):
+        records = pd.read_json(path, orient='records', convert_dates=False)
+    else:
+        records = pd.read_csv(path)
+    if records.empty:
+        return records
+    records['Date'] = pd.to_datetime(records['Date'])
+    if 'Day of week' not in records.columns:
+        records['Day of week'] = records['Date'].dt.day_name()
+    return records
+
+
+def rows_after(records, last_date):
+    """The records dated after the last ingested day (all of them when there is none).
+
+    A day is one record, so when several files carry the same date the
+    most recently read one wins.
+    """
+    records = records.drop_duplicates('Date', keep='last')
+    if last_date is None:
+        return records
+    return records[records['Date'] > last_date]
+
+
+class DropDirectory:
+    """CSV/JSON record files dropped into ``path``, reported once per change."""
+
+    def __init__(self, path):
+        self.path = path
+        self.seen = {}
+
+    def poll(self):
+        """New rows of every new or changed file, or None.
+
+        Files count as seen only once all of them were read. A half-written
+        file makes the whole poll fail and be retried, rather than have the
+        files read before it skipped next time while their rows are lost.
+        """
+        if not os.path.isdir(self.path):
+            return None
+        frames, read = [], {}
+        for name in sorted(os.listdir(self.path)):
+            if not name.endswith(RECORD_EXTENSIONS):
+                continue
+            path = os.path.join(self.path, name)
+            mtime_ns = os.stat(path).st_mtime_ns
+            if self.seen.get(name) == mtime_ns:
+                continue
+            records = read_record_file(path)
+            if len(records):
+                frames.append(records)
+            read[name] = mtime_ns
+        self.seen.update(read)
+        return pd.concat(frames, ignore_index=True) if frames else None
+
+    def reset(self):
+        """Report every file again, e.g. after the base dataset was reloaded."""
+        self.seen = {}
+
+
+class WatchedFile:
+    """The source file of a dataset, rebuilt with ``load()`` when it changes on disk."""
+
+    def __init__(self, path, load):
+        self.path = path
+        self.load = load
+        self.stamp = self.pending = self._stamp()
+
+    def _stamp(self):
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+
+    def poll(self):
+        """A freshly loaded dataset if the file changed since the last commit, else None.
+
+        The new stamp is held back until ``commit``, which the caller makes
+        once the dataset is in use, so a load that is thrown away (or fails)
+        is retried at the next poll.
+        """
+        stamp = self._stamp()
+        if stamp is None or stamp == self.stamp:
+            return None
+        dataset = self.load()
+        self.pending = stamp
+        return dataset
+
+    def commit(self):
+        self.stamp = self.pending
+
+
+class LiveDataset:
+    """Holds the current StepDataset and swaps in a new one when the data changes.
+
+    ``refresh`` polls at most every ``min_interval`` seconds. While one
+    thread is merging, other callers get the current snapshot immediately.
+    After ``start`` a background thread does the polling and ``refresh``
+    just returns the current snapshot.
+    """
+
+    def __init__(self, dataset, sources=(), min_interval=5.0, reload=None):
+        self.current = dataset
+        self.sources = list(sources)
+        self.min_interval = min_interval
+        self.reload = reload
+        self.last_poll = 0.0
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._thread = None
+
+    def watch(self, source):
+        self.sources.append(source)
+        return self
+
+    def refresh(self, force=False):
+        if self._thread is not None and not force:
+            return self.current
+        if (not self.sources and self.reload is None) or (
+            not force and time.monotonic() - self.last_poll < self.min_interval
+        ):
+            return self.current
+        if not self._lock.acquire(blocking=False):
+            return self.current
+        try:
+            self.last_poll = time.monotonic()
+            dataset = self.reload.poll() if self.reload is not None else None
+            reloaded = dataset is not None
+            if reloaded:
+                for source in self.sources:
+                    source.reset()
+            else:
+                dataset = self.current
+            for source in self.sources:
+                records = source.poll()
+                if records is None:
+                    continue
+                new_rows = rows_after(records, dataset.last_date)
+                if len(new_rows):
+                    dataset = dataset.appended(new_rows)
+            # One swap, so readers see either the old snapshot or the finished new one
+            self.current = dataset
+            if reloaded:
+                # Only now: had a source failed above, the reload would be retried
+                self.reload.commit()
+        finally:
+            self._lock.release()
+        return self.current
+
+    def start(self, interval=None):
+        """Refresh on a daemon thread every ``interval`` seconds (``min_interval`` by default).
+
+        The thread only holds a weak reference, so it ends once the dataset
+        is dropped, e.g. evicted from a cache.
+        """
+        if self._thread is None:
+            self._thread = threading.Thread(
+                target=_refresh_loop, args=(weakref.ref(self), self._wake, interval or self.min_interval),
+                name='step-data-refresh', daemon=True
+            )
+            self._thread.start()
+        return self
+
+    def wake(self):
+        """Refresh now instead of at the next interval, e.g. on a change notification."""
+        self._wake.set()
+
+
+def _refresh_loop(live_ref, wake, interval):
+    while True:
+        wake.wait(interval)
+        wake.clear()
+        live = live_ref()
+        if live is None:
+            return
+        try:
+            live.refresh(force=True)
+        except Exception:
+            logger.exception("Background refresh failed; serving the last good dataset")
+        del live
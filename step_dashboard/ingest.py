@@ -0,0 +1,110 @@
+"""Reading the step dataset from Excel, Parquet or Arrow IPC files.
+
+Excel stays the source of truth. The first time a workbook is read it is
+converted to a Parquet sidecar named after the workbook's path, mtime and
+content hash, and later reads memory-map that sidecar instead of parsing the
+workbook.
+"""
+import hashlib
+import os
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.ipc as ipc
+
+SOURCE_PATH = 'personal_dataset.xlsx'
+SIDECAR_DIR = '.step_cache'
+
+
+def file_fingerprint(path):
+    """Short key built from the file's mtime and a hash of its bytes."""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as fh:
+        for chunk in iter(lambda: fh.read(1 << 20), b''):
+            digest.update(chunk)
+    mtime_ns = os.stat(path).st_mtime_ns
+    return f"{mtime_ns:x}-{digest.hexdigest()[:16]}"
+
+
+def sidecar_owner(path):
+    """The workbook's name plus a hash of its directory, shared by all its sidecars."""
+    stem = os.path.splitext(os.path.basename(path))[0]
+    directory = os.path.dirname(os.path.abspath(path))
+    return f"{stem}.{hashlib.sha256(directory.encode('utf-8')).hexdigest()[:8]}"
+
+
+def sidecar_path(path, cache_dir=SIDECAR_DIR):
+    return os.path.join(cache_dir, f"{sidecar_owner(path)}.{file_fingerprint(path)}.parquet")
+
+
+def read_parquet(path):
+    return pd.read_parquet(path, memory_map=True)
+
+
+def read_arrow(path):
+    with pa.memory_map(path, 'r') as source:
+        table = ipc.open_file(source).read_all()
+    return table.to_pandas()
+
+
+def read_excel(path, cache_dir=SIDECAR_DIR):
+    """Read a workbook through its Parquet sidecar, building it when missing."""
+    sidecar = sidecar_path(path, cache_dir)
+    if os.path.exists(sidecar):
+        return read_parquet(sidecar)
+
+    df = pd.read_excel(path)
+    try:
+        write_sidecar(df, sidecar)
+    except (OSError, ValueError, pa.ArrowException):
+        # The sidecar is only a cache: a read-only checkout, or a column Parquet
+        # cannot store (e.g. numbers mixed into Temperature), just skips the fast path
+        pass
+    return df
+
+
+def write_sidecar(df, sidecar):
+    cache_dir = os.path.dirname(sidecar) or '.'
+    os.makedirs(cache_dir, exist_ok=True)
+
+    tmp_path = f"{sidecar}.{os.getpid()}.tmp"
+    try:
+        df.to_parquet(tmp_path, index=False)
+        os.replace(tmp_path, sidecar)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+    # Older sidecars of the same workbook are stale once a new one exists;
+    # "x.v2.xlsx" or an "x.xlsx" in another directory has a different owner
+    owner = os.path.basename(sidecar).rsplit('.', 2)[0]
+    for name in os.listdir(cache_dir):
+        old = os.path.join(cache_dir, name)
+        if name.endswith('.parquet') and name.rsplit('.', 2)[0] == owner and old != sidecar:
+            try:
+                os.remove(old)
+            except OSError:
+                pass
+
+
+READERS = {
+    '.xlsx': read_excel,
+    '.xls': read_excel,
+    '.parquet': read_parquet,
+    '.arrow': read_arrow,
+    '.feather': read_arrow,
+    '.ipc': read_arrow,
+}
+
+
+def register_reader(extension, reader):
+    READERS[extension.lower()] = reader
+
+
+def read_source(path=SOURCE_PATH):
+    """Read the raw step records from ``path`` using the reader for its extension."""
+    extension = os.path.splitext(path)[1].lower()
+    if extension not in READERS:
+        raise ValueError(f"Unsupported data file type: {extension or path}")
+    return READERS[extension](path)
@@ -0,0 +1,167 @@
+"""Per-stage timing of dashboard runs for the developer panel and monitoring.
+
+Each script run gets a ``RunProbe``. Every stage is timed, and the probe
+records the row count and memory of the frame the stage produced.
+Finished probes are folded into a process-wide ``MetricsRegistry``. The
+registry logs one JSON line per run and renders Prometheus text
+exposition format. It can also keep that text in a file for the node
+exporter's textfile collector.
+"""
+import json
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+METRIC_PREFIX = 'step_dashboard'
+
+
+class Stage:
+    def __init__(self, name):
+        self.name = name
+        self.seconds = 0.0
+        self.calls = 0
+        self.rows = None
+        self.frame_bytes = None
+
+    def frame(self, df):
+        """Record the size of the frame this stage produced."""
+        self.rows = len(df)
+        self.frame_bytes = int(df.memory_usage(deep=True).sum())
+        return df
+
+
+class RunProbe:
+    """Timings of one script run; a stage entered more than once accumulates.
+
+    ``fragment`` names the section when the run was a fragment rerun.
+    """
+
+    def __init__(self, fragment=None):
+        self.fragment = fragment
+        self.finished = False
+        self.stages = {}
+        self.started = time.perf_counter()
+
+    def for_fragment(self, name):
+        """This probe while its run is still going; a new one when fragment ``name`` reruns on its own later."""
+        return self if not self.finished else RunProbe(fragment=name)
+
+    @contextmanager
+    def stage(self, name):
+        stage = self.stages.get(name)
+        if stage is None:
+            stage = self.stages[name] = Stage(name)
+        start = time.perf_counter()
+        try:
+            yield stage
+        finally:
+            stage.seconds += time.perf_counter() - start
+            stage.calls += 1
+
+    def elapsed(self):
+        return time.perf_counter() - self.started
+
+    def table(self):
+        rows = [
+            {
+                'stage': stage.name,
+                'ms': stage.seconds * 1000,
+                'calls': stage.calls,
+                'rows': stage.rows,
+                'MiB': stage.frame_bytes / 2 ** 20 if stage.frame_bytes is not None else None,
+            }
+            for stage in self.stages.values()
+        ]
+        return pd.DataFrame(rows, columns=['stage', 'ms', 'calls', 'rows', 'MiB'])
+
+
+def escape_label(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+class MetricsRegistry:
+    """Totals over every finished run in this process, shared by all sessions."""
+
+    def __init__(self, textfile=None):
+        self.textfile = textfile
+        self.runs = 0
+        self.run_seconds = 0.0
+        self.stages = {}
+        self._lock = threading.Lock()
+
+    def finish(self, probe, **labels):
+        """Fold ``probe`` into the totals and log it; ``labels`` go into the log line only."""
+        total = probe.elapsed()
+        probe.finished = True
+        with self._lock:
+            self.runs += 1
+            self.run_seconds += total
+            for stage in probe.stages.values():
+                stats = self.stages.setdefault(stage.name, {'seconds': 0.0, 'count': 0, 'rows': None, 'bytes': None})
+                stats['seconds'] += stage.seconds
+                stats['count'] += stage.calls
+                if stage.rows is not None:
+                    stats['rows'] = stage.rows
+                    stats['bytes'] = stage.frame_bytes
+
+        logger.info(json.dumps({
+            'event': 'dashboard_run',
+            'fragment': probe.fragment,
+            'total_ms': round(total * 1000, 3),
+            'stages': {
+                stage.name: {
+                    'ms': round(stage.seconds * 1000, 3),
+                    'calls': stage.calls,
+                    'rows': stage.rows,
+                    'bytes': stage.frame_bytes,
+                }
+                for stage in probe.stages.values()
+            },
+            **labels,
+        }, default=str))
+
+        if self.textfile:
+            self.write_textfile(self.textfile)
+
+    def prometheus_text(self):
+        with self._lock:
+            stages = {name: dict(stats) for name, stats in self.stages.items()}
+            runs, run_seconds = self.runs, self.run_seconds
+
+        lines = [
+            f"# HELP {METRIC_PREFIX}_runs_total Script runs measured.",
+            f"# TYPE {METRIC_PREFIX}_runs_total counter",
+            f"{METRIC_PREFIX}_runs_total {runs}",
+            f"# HELP {METRIC_PREFIX}_run_seconds_total Wall time of measured script runs.",
+            f"# TYPE {METRIC_PREFIX}_run_seconds_total counter",
+            f"{METRIC_PREFIX}_run_seconds_total {run_seconds:.6f}",
+            f"# HELP {METRIC_PREFIX}_stage_seconds Time spent in each stage of a script run.",
+            f"# TYPE {METRIC_PREFIX}_stage_seconds summary",
+        ]
+        for name, stats in sorted(stages.items()):
+            label = f'stage="{escape_label(name)}"'
+            lines.append(f"{METRIC_PREFIX}_stage_seconds_sum{{{label}}} {stats['seconds']:.6f}")
+            lines.append(f"{METRIC_PREFIX}_stage_seconds_count{{{label}}} {stats['count']}")
+
+        for metric, key, help_text in [
+            ('stage_rows', 'rows', 'Rows in the frame the stage produced in the latest run.'),
+            ('stage_frame_bytes', 'bytes', 'Memory of the frame the stage produced in the latest run.'),
+        ]:
+            lines.append(f"# HELP {METRIC_PREFIX}_{metric} {help_text}")
+            lines.append(f"# TYPE {METRIC_PREFIX}_{metric} gauge")
+            for name, stats in sorted(stages.items()):
+                if stats[key] is not None:
+                    lines.append(f'{METRIC_PREFIX}_{metric}{{stage="{escape_label(name)}"}} {stats[key]}')
+        return '\n'.join(lines) + '\n'
+
+    def write_textfile(self, path):
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write(self.prometheus_text())
+        os.replace(tmp_path, path)
@@ -0,0 +1,131 @@
+"""Minute-level step samples kept as compact, memory-mapped numpy arrays.
+
+A store is a directory holding a dense ``days x 1440`` uint16 matrix of
+steps per minute and the date of each row, plus two rollups computed once
+when the store is written: daily totals and a ``days x 24`` hourly matrix.
+Daily and hourly views read the rollups, never the minute matrix. The
+daily totals replace the workbook's step counts (``with_intraday_steps``),
+so the KPIs, calendar and charts use the wearable's numbers.
+
+Build a store from a CSV of ``Timestamp,Steps`` samples with::
+
+    python -m step_dashboard.intraday samples.csv intraday/
+"""
+import argparse
+import os
+from functools import cached_property
+
+import numpy as np
+import pandas as pd
+
+MINUTES_PER_DAY = 24 * 60
+
+
+def write_store(path, samples):
+    """Write ``samples`` (Timestamp and Steps columns) as an intraday store at ``path``."""
+    timestamps = pd.to_datetime(samples['Timestamp'])
+    days = timestamps.dt.normalize()
+    first = days.min()
+    day_index = ((days - first) // pd.Timedelta(days=1)).to_numpy(dtype='int64')
+    minute = (timestamps.dt.hour * 60 + timestamps.dt.minute).to_numpy(dtype='int64')
+    n_days = int(day_index.max()) + 1
+
+    totals = np.bincount(
+        day_index * MINUTES_PER_DAY + minute,
+        weights=samples['Steps'].to_numpy(dtype='float64'),
+        minlength=n_days * MINUTES_PER_DAY,
+    )
+    minutes = np.clip(totals, 0, np.iinfo(np.uint16).max).astype(np.uint16).reshape(n_days, MINUTES_PER_DAY)
+    dates = np.datetime64(first.date(), 'D') + np.arange(n_days)
+
+    os.makedirs(path, exist_ok=True)
+    np.save(os.path.join(path, 'minutes.npy'), minutes)
+    np.save(os.path.join(path, 'dates.npy'), dates)
+    np.save(os.path.join(path, 'daily.npy'), minutes.sum(axis=1, dtype=np.uint32))
+    np.save(os.path.join(path, 'hourly.npy'), minutes.reshape(n_days, 24, 60).sum(axis=2, dtype=np.uint32))
+
+
+class IntradayStore:
+    def __init__(self, path):
+        self.path = path
+
+    def _load(self, name):
+        return np.load(os.path.join(self.path, f"{name}.npy"), mmap_mode='r')
+
+    @cached_property
+    def minutes(self):
+        return self._load('minutes')
+
+    @cached_property
+    def dates(self):
+        return np.asarray(self._load('dates'))
+
+    @cached_property
+    def daily(self):
+        return np.asarray(self._load('daily'))
+
+    @cached_property
+    def hourly(self):
+        return np.asarray(self._load('hourly'))
+
+    def daily_steps(self):
+        """Steps per day at the grain the dashboard's KPIs and charts use.
+
+        Days without a single sample are left out rather than counted as 0.
+        """
+        recorded = self.daily > 0
+        return pd.Series(
+            self.daily[recorded].astype('int64'),
+            index=pd.DatetimeIndex(self.dates[recorded], name='Date'),
+            name='Step Count',
+        )
+
+    def day_positions(self, dates):
+        """Rows of the stored days among ``dates``; dates outside the store are skipped."""
+        offsets = (pd.DatetimeIndex(dates).to_numpy().astype('datetime64[D]') - self.dates[0]).astype('int64')
+        offsets = offsets[(offsets >= 0) & (offsets < len(self.dates))]
+        return offsets[self.daily[offsets] > 0]
+
+    def hourly_profile(self, dates=None):
+        """Mean steps per hour of day over ``dates`` (every recorded day when None)."""
+        rows = self.day_positions(dates) if dates is not None else np.flatnonzero(self.daily > 0)
+        if len(rows) == 0:
+            return pd.Series(np.zeros(24), index=pd.RangeIndex(24, name='Hour'), name='Steps')
+        return pd.Series(self.hourly[rows].mean(axis=0), index=pd.RangeIndex(24, name='Hour'), name='Steps')
+
+
+
+def with_intraday_steps(records, store):
+    """``records`` with each day's Step Count taken from the store's daily rollup.
+
+    Days the store has but the records lack are added with only Date, Day of
+    week and Step Count; without a temperature they show up as temperature
+    issues and stay out of the temperature views.
+    """
+    daily = store.daily_steps()
+    dates = pd.to_datetime(records['Date']).dt.normalize()
+    recorded = dates.isin(daily.index).to_numpy()
+    records.loc[recorded, 'Step Count'] = daily.reindex(dates[recorded]).to_numpy()
+    extra = daily[~daily.index.isin(dates)]
+    if len(extra) == 0:
+        return records
+    return pd.concat([records, pd.DataFrame({
+        'Date': extra.index,
+        'Day of week': extra.index.day_name(),
+        'Step Count': extra.to_numpy(),
+    })], ignore_index=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build an intraday store from minute-level step samples.")
+    parser.add_argument('samples', help='CSV with Timestamp and Steps columns')
+    parser.add_argument('path', help='directory to write the store to')
+    args = parser.parse_args()
+
+    samples = pd.read_csv(args.samples)
+    write_store(args.path, samples)
+    print(f"Wrote {len(samples)} samples to {args.path}")
+
+
+if __name__ == '__main__':
+    main()
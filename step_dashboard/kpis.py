@@ -0,0 +1,64 @@
+"""The eight headline KPIs, memoized on the filter combination that produced them."""
+from dataclasses import dataclass
+
+from .cache import LRUCache
+from .filters import DAY_ORDER
+from .streaks import summarize_streaks
+
+
+@dataclass(frozen=True)
+class Kpis:
+    avg_steps: float
+    goal_pct: float
+    max_steps: int
+    min_steps: int
+    most_active_day: str
+    most_active_location: str
+    best_temp: str
+    highest_streak: int
+
+
+def assemble_kpis(averages, goal_days, days, max_steps, min_steps, highest_streak):
+    """Kpis from per-dimension averages and the counts behind the other KPIs."""
+    return Kpis(
+        avg_steps=averages.overall,
+        goal_pct=goal_days / days * 100,
+        max_steps=max_steps,
+        min_steps=min_steps,
+        most_active_day=averages.day_of_week.reindex(DAY_ORDER).idxmax(),
+        most_active_location=averages.location.idxmax(),
+        best_temp=str(averages.temp_bin.idxmax()),
+        highest_streak=highest_streak,
+    )
+
+
+def compute_kpis(filtered_df, goal, averages):
+    """KPIs for the filtered rows; ``averages`` comes from RollupCube.averages."""
+    steps = filtered_df['Step Count']
+    by_date = filtered_df if filtered_df['Date'].is_monotonic_increasing else filtered_df.sort_values('Date')
+    streaks = summarize_streaks(by_date['Date'], by_date['Step Count'] >= goal, calendar_aware=True)
+    return assemble_kpis(averages, (steps >= goal).sum(), len(filtered_df), steps.max(), steps.min(), streaks.longest)
+
+
+class KpiEngine:
+    """KPIs for one dataset, cached on (filters, goal) and shared by all sessions."""
+
+    def __init__(self, filter_index, rollup, maxsize=256):
+        self.filter_index = filter_index
+        self.rollup = rollup
+        self.cache = LRUCache(maxsize)
+
+    def kpis(self, date_range, start_date, end_date, location, day_type, temp_range, goal):
+        if date_range != 'Custom Range':
+            # The dates only matter for a custom range, keep them out of the key otherwise
+            start_date = end_date = None
+        key = (date_range, start_date, end_date, location, day_type, temp_range, goal)
+
+        filters = (date_range, location, day_type, temp_range, start_date, end_date)
+        return self.cache.get_or_compute(key, lambda: self.compute(filters, goal))
+
+    def compute(self, filters, goal):
+        return compute_kpis(self.filter_index.select(*filters), goal, self.rollup.averages(*filters))
+
+    def cache_info(self):
+        return self.cache.cache_info()
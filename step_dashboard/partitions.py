@@ -0,0 +1,156 @@
+"""Per-user step records stored as Parquet files partitioned by month.
+
+Layout::
+
+    <root>/user=<user id>/month=<YYYY-MM>/part.parquet
+
+A session only ever touches its own user's directory, and only reads the
+months its date filter reaches. Partitions that were read are kept in a
+small LRU cache keyed on their modification time, so widening the range
+reuses what is already in memory.
+
+Convert a workbook with::
+
+    python -m step_dashboard.partitions personal_dataset.xlsx data --user alex
+"""
+import argparse
+import os
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+
+from .cache import LRUCache
+from .incremental import WatchedFile
+from .ingest import read_source
+
+PARTITION_FILE = 'part.parquet'
+
+
+def month_key(timestamp):
+    return pd.Timestamp(timestamp).strftime('%Y-%m')
+
+
+def write_partitions(df, root, user):
+    """Write ``df`` under ``root`` for ``user``, replacing the months it covers."""
+    dates = pd.to_datetime(df['Date'])
+    for month, part in df.groupby(dates.dt.strftime('%Y-%m'), sort=True):
+        directory = os.path.join(root, f"user={user}", f"month={month}")
+        os.makedirs(directory, exist_ok=True)
+        path = os.path.join(directory, PARTITION_FILE)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        part.sort_values('Date').to_parquet(tmp_path, index=False)
+        os.replace(tmp_path, path)
+
+
+class PartitionedStore:
+    def __init__(self, root, maxsize=256):
+        self.root = root
+        self.partitions = LRUCache(maxsize)
+
+    def user_dir(self, user):
+        if not user or os.sep in user or user in ('.', '..'):
+            raise ValueError(f"Invalid user id: {user!r}")
+        return os.path.join(self.root, f"user={user}")
+
+    def users(self):
+        if not os.path.isdir(self.root):
+            return []
+        return sorted(name[len('user='):] for name in os.listdir(self.root) if name.startswith('user='))
+
+    def months(self, user):
+        directory = self.user_dir(user)
+        if not os.path.isdir(directory):
+            return []
+        return sorted(name[len('month='):] for name in os.listdir(directory) if name.startswith('month='))
+
+    def partition_path(self, user, month):
+        return os.path.join(self.user_dir(user), f"month={month}", PARTITION_FILE)
+
+    def read_partition(self, user, month, columns=None):
+        path = self.partition_path(user, month)
+        key = (user, month, os.stat(path).st_mtime_ns, tuple(columns) if columns else None)
+        return self.partitions.get_or_compute(key, lambda: pd.read_parquet(path, columns=columns, memory_map=True))
+
+    def date_bounds(self, user):
+        """First and last date for ``user``, reading only the Date column of the outer months."""
+        months = self.months(user)
+        if not months:
+            raise LookupError(f"No data for user {user!r}")
+        first = self.read_partition(user, months[0], ['Date'])['Date'].min()
+        last = self.read_partition(user, months[-1], ['Date'])['Date'].max()
+        return pd.Timestamp(first), pd.Timestamp(last)
+
+    def months_for_range(self, user, date_range, start_date=None, end_date=None):
+        """The partitions a dashboard date filter can reach."""
+        months = self.months(user)
+        if date_range in ('Last 30 Days', 'Last 60 Days'):
+            days = 30 if date_range == 'Last 30 Days' else 60
+            cutoff = self.date_bounds(user)[1] - pd.Timedelta(days=days)
+            return tuple(month for month in months if month >= month_key(cutoff))
+        if date_range == 'Custom Range' and start_date is not None and end_date is not None:
+            first, last = month_key(start_date), month_key(end_date)
+            return tuple(month for month in months if first <= month <= last)
+        return tuple(months)
+
+    def load(self, user, months=None):
+        """Concatenated records of ``user`` for ``months`` (all months when None)."""
+        months = self.months(user) if months is None else months
+        parts = [self.read_partition(user, month) for month in months]
+        if not parts:
+            raise LookupError(f"No data for user {user!r}")
+        return pd.concat(parts, ignore_index=True)
+
+    def load_users(self, users):
+        """Every record of ``users`` in one frame with a ``User`` column.
+
+        The partitions are read as one Arrow dataset, which reads files in
+        parallel; these reads bypass the per-partition cache.
+        """
+        paths = [self.partition_path(user, month) for user in users for month in self.months(user)]
+        if not paths:
+            raise LookupError(f"No data for users {list(users)!r}")
+        partitioning = ds.partitioning(pa.schema([('user', pa.string()), ('month', pa.string())]), flavor='hive')
+        dataset = ds.dataset(paths, format='parquet', partitioning=partitioning, partition_base_dir=self.root)
+        df = dataset.to_table().to_pandas()
+        return df.drop(columns='month').rename(columns={'user': 'User'})
+
+
+class WatchedPartitions(WatchedFile):
+    """A user's partitions, rebuilt with ``load()`` when one of ``months`` is rewritten.
+
+    With ``months`` None every month counts, so a new month also triggers it.
+    """
+
+    def __init__(self, store, user, months, load):
+        self.store = store
+        self.user = user
+        self.months = months
+        super().__init__(store.user_dir(user), load)
+
+    def _stamp(self):
+        months = self.store.months(self.user) if self.months is None else self.months
+        stamps = []
+        for month in months:
+            try:
+                stat = os.stat(self.store.partition_path(self.user, month))
+            except FileNotFoundError:
+                continue
+            stamps.append((month, stat.st_mtime_ns, stat.st_size))
+        return tuple(stamps) or None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Write a step data file as per-user monthly Parquet partitions.")
+    parser.add_argument('source', help='Excel, Parquet or Arrow file with the step records')
+    parser.add_argument('root', help='partition root directory')
+    parser.add_argument('--user', required=True, help='user id the records belong to')
+    args = parser.parse_args()
+
+    df = read_source(args.source)
+    write_partitions(df, args.root, args.user)
+    print(f"Wrote {len(df)} rows for user {args.user} under {args.root}")
+
+
+if __name__ == '__main__':
+    main()
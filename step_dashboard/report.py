@@ -0,0 +1,174 @@
+"""The dashboard's load, filter and KPI logic without Streamlit, plus a batch CLI.
+
+Compute every filter combination for every user of a partition root on all
+cores and write one record per (user, filters)::
+
+    python -m step_dashboard.report reports.parquet --root data
+    python -m step_dashboard.report reports.json --source personal_dataset.xlsx
+
+Parquet output is two files: the KPIs, and ``<name>.averages.parquet`` with
+the per-dimension averages in long form. JSON output nests the averages in
+each record.
+"""
+import argparse
+import itertools
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import asdict
+
+import numpy as np
+import pandas as pd
+
+from .dataset import StepDataset
+from .derive import TEMP_LABELS, derive_columns
+from .filters import ALL_LOCATIONS, ALL_TEMPERATURES, DATE_RANGES, DAY_TYPES
+from .ingest import SOURCE_PATH, read_source
+from .intraday import with_intraday_steps
+from .partitions import PartitionedStore
+
+DEFAULT_GOAL = 11000
+FILTER_FIELDS = ['date_range', 'location', 'day_type', 'temp_range', 'start_date', 'end_date']
+DIMENSIONS = ['day_of_week', 'location', 'temp_bin']
+
+
+def load_frame(user=None, months=None, store=None, source=SOURCE_PATH, intraday=None):
+    """Derived records and temperature issues, from ``store`` for a user or from ``source``.
+
+    With an ``intraday`` store the daily step counts come from its rollup.
+    """
+    df = read_source(source) if user is None else store.load(user, months)
+    df['Date'] = pd.to_datetime(df['Date'])
+    if intraday is not None:
+        df = with_intraday_steps(df, intraday)
+    df = df.sort_values('Date')
+    return derive_columns(df)
+
+
+def load_dataset(user=None, months=None, store=None, source=SOURCE_PATH, intraday=None):
+    return StepDataset(*load_frame(user, months, store, source, intraday))
+
+
+def filter_combinations(dataset, start_date=None, end_date=None):
+    """Every dashboard filter combination for ``dataset``.
+
+    The custom range is included only when both of its dates are given.
+    """
+    date_ranges = [(date_range, None, None) for date_range in DATE_RANGES if date_range != 'Custom Range']
+    if start_date is not None and end_date is not None:
+        date_ranges.append(('Custom Range', pd.Timestamp(start_date), pd.Timestamp(end_date)))
+    locations = [ALL_LOCATIONS] + dataset.filter_index.locations
+    temperatures = [ALL_TEMPERATURES] + TEMP_LABELS
+    for (date_range, start, end), location, day_type, temp_range in itertools.product(
+        date_ranges, locations, DAY_TYPES, temperatures
+    ):
+        yield (date_range, location, day_type, temp_range, start, end)
+
+
+def report(dataset, filters, goal=DEFAULT_GOAL):
+    """KPIs and per-dimension averages for one filter combination, as plain Python values.
+
+    An empty selection has ``rows`` 0 and no KPIs.
+    """
+    date_range, location, day_type, temp_range, start_date, end_date = filters
+    rows = len(dataset.filter_index.positions(*filters))
+    record = dict(zip(FILTER_FIELDS, filters), goal=goal, rows=rows, kpis=None, averages=None)
+    if rows == 0:
+        return record
+
+    kpis = dataset.kpi_engine.kpis(date_range, start_date, end_date, location, day_type, temp_range, goal)
+    averages = dataset.rollup.averages(*filters)
+    record['kpis'] = {name: plain(value) for name, value in asdict(kpis).items()}
+    record['averages'] = {
+        name: {str(label): float(value) for label, value in getattr(averages, name).items()}
+        for name in DIMENSIONS
+    }
+    return record
+
+
+def plain(value):
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, pd.Timestamp):
+        return value.isoformat()
+    return value
+
+
+def user_reports(task):
+    """All reports for one user; runs in a worker process."""
+    user, root, source, goal, start_date, end_date = task
+    store = PartitionedStore(root) if root else None
+    dataset = load_dataset(user, store=store, source=source)
+    records = []
+    for filters in filter_combinations(dataset, start_date, end_date):
+        record = report(dataset, filters, goal)
+        record['user'] = user
+        records.append(record)
+    return records
+
+
+def run_batch(users, root=None, source=SOURCE_PATH, goal=DEFAULT_GOAL, start_date=None, end_date=None, workers=None):
+    """Reports for ``users`` (``[None]`` for the workbook), one user per worker task."""
+    tasks = [(user, root, source, goal, start_date, end_date) for user in users]
+    if workers == 1 or len(tasks) == 1:
+        results = map(user_reports, tasks)
+        return [record for records in results for record in records]
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        results = pool.map(user_reports, tasks, chunksize=max(1, len(tasks) // (4 * (workers or os.cpu_count() or 1))))
+        return [record for records in results for record in records]
+
+
+def kpi_frame(records):
+    rows = [
+        {'user': record['user'], **{field: record[field] for field in FILTER_FIELDS},
+         'goal': record['goal'], 'rows': record['rows'], **(record['kpis'] or {})}
+        for record in records
+    ]
+    return pd.DataFrame(rows)
+
+
+def averages_frame(records):
+    rows = [
+        {'user': record['user'], **{field: record[field] for field in FILTER_FIELDS},
+         'dimension': dimension, 'value': label, 'average': average}
+        for record in records if record['averages']
+        for dimension in DIMENSIONS
+        for label, average in record['averages'][dimension].items()
+    ]
+    return pd.DataFrame(rows)
+
+
+def write_reports(records, path):
+    if path.endswith('.parquet'):
+        kpi_frame(records).to_parquet(path, index=False)
+        averages_frame(records).to_parquet(f"{path[:-len('.parquet')]}.averages.parquet", index=False)
+    elif path.endswith('.json'):
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(records, f, default=plain, ensure_ascii=False)
+    else:
+        raise ValueError(f"Unsupported report format: {path}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compute dashboard KPIs for many users and filter combinations.")
+    parser.add_argument('output', help='.json or .parquet file to write')
+    parser.add_argument('--root', help='partition root (see step_dashboard.partitions); omit to use --source')
+    parser.add_argument('--users', nargs='*', help='users to report on (default: every user under --root)')
+    parser.add_argument('--source', default=SOURCE_PATH, help='single-user data file when --root is not given')
+    parser.add_argument('--goal', type=int, default=DEFAULT_GOAL)
+    parser.add_argument('--start', help='also report a custom range starting on this date')
+    parser.add_argument('--end', help='end date of the custom range')
+    parser.add_argument('--workers', type=int, help='worker processes (default: one per core)')
+    args = parser.parse_args()
+
+    if args.root:
+        users = args.users or PartitionedStore(args.root).users()
+    else:
+        users = [None]
+    records = run_batch(users, args.root, args.source, args.goal, args.start, args.end, args.workers)
+    write_reports(records, args.output)
+    print(f"Wrote {len(records)} reports for {len(users)} user(s) to {args.output}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,91 @@
+"""Pre-aggregated step totals for the per-dimension averages.
+
+The cube keeps the sum and count of Step Count for every
+(Date, Location, Day of week, Temp_Bin) cell. A filter combination selects
+cells through the same FilterIndex the dashboard uses for rows, and the
+average per day of week, location or temperature bin is the ratio of the
+summed cells, so no row is scanned after load.
+"""
+from collections import namedtuple
+
+import numpy as np
+import pandas as pd
+
+from .derive import WEEKEND_DAYS, concat_compact
+from .filters import FilterIndex
+
+CELL_KEYS = ['Date', 'Location', 'Day of week', 'Temp_Bin']
+
+DimensionAverages = namedtuple('DimensionAverages', ['day_of_week', 'location', 'temp_bin', 'overall'])
+
+
+def build_cells(df):
+    cells = (
+        df.groupby(CELL_KEYS, observed=True, dropna=False, sort=False)['Step Count']
+        .agg(['sum', 'count'])
+        .reset_index()
+    )
+    cells['Day_Type'] = np.where(cells['Day of week'].isin(WEEKEND_DAYS), 'Weekend', 'Weekday')
+    return cells.sort_values('Date', kind='stable').reset_index(drop=True)
+
+
+def append_categorical(old, values):
+    """``old`` followed by ``values``; categories stay sorted when new ones appear."""
+    added = pd.Index(pd.unique(values.dropna().astype(object)))
+    added = added[~added.isin(old.categories)]
+    categories = old.categories
+    if len(added):
+        categories = categories.append(added).sort_values()
+        old = old.set_categories(categories)
+    new = pd.Categorical(values, categories=categories)
+    return pd.Categorical.from_codes(np.concatenate([old.codes, new.codes]), categories=categories, ordered=old.ordered)
+
+
+class RollupCube:
+    def __init__(self, df):
+        self.cells = build_cells(df)
+        self.index = FilterIndex(self.cells)
+
+        self.sums = self.cells['sum'].to_numpy(dtype='float64')
+        self.counts = self.cells['count'].to_numpy(dtype='int64')
+        self.dimensions = {
+            'day_of_week': pd.Categorical(self.cells['Day of week']),
+            'location': pd.Categorical(self.cells['Location']),
+            'temp_bin': pd.Categorical(self.cells['Temp_Bin'], categories=df['Temp_Bin'].cat.categories),
+        }
+
+    def appended(self, new_df):
+        """A new cube with the cells of ``new_df`` (dated after this cube's rows) added."""
+        new_cells = build_cells(new_df)
+        cube = RollupCube.__new__(RollupCube)
+        cube.cells = concat_compact([self.cells, new_cells]).reset_index(drop=True)
+        cube.index = self.index.appended(new_cells)
+        cube.sums = np.concatenate([self.sums, new_cells['sum'].to_numpy(dtype='float64')])
+        cube.counts = np.concatenate([self.counts, new_cells['count'].to_numpy(dtype='int64')])
+        cube.dimensions = {
+            'day_of_week': append_categorical(self.dimensions['day_of_week'], new_cells['Day of week']),
+            'location': append_categorical(self.dimensions['location'], new_cells['Location']),
+            'temp_bin': append_categorical(self.dimensions['temp_bin'], new_cells['Temp_Bin']),
+        }
+        return cube
+
+    def dimension_average(self, name, positions):
+        """Mean steps per value of one dimension, over the observed values only."""
+        categorical = self.dimensions[name]
+        codes = categorical.codes[positions]
+        known = codes >= 0
+        size = len(categorical.categories)
+        sums = np.bincount(codes[known], weights=self.sums[positions][known], minlength=size)
+        counts = np.bincount(codes[known], weights=self.counts[positions][known], minlength=size)
+        observed = counts > 0
+        return pd.Series(sums[observed] / counts[observed], index=categorical.categories[observed], name='Step Count')
+
+    def averages(self, date_range, location, day_type, temp_range, start_date=None, end_date=None):
+        positions = self.index.positions(date_range, location, day_type, temp_range, start_date, end_date)
+        total = self.counts[positions].sum()
+        return DimensionAverages(
+            day_of_week=self.dimension_average('day_of_week', positions),
+            location=self.dimension_average('location', positions),
+            temp_bin=self.dimension_average('temp_bin', positions),
+            overall=self.sums[positions].sum() / total if total else np.nan,
+        )
@@ -0,0 +1,271 @@
+"""Static snapshots of the dashboard for every fixed filter combination.
+
+With the fixed selectbox options the dashboard's output is fully
+determined, so it can be rendered ahead of time and served by any static
+file server. The calendar is rendered for every month of the selection.
+The custom date range is left out, since its dates are free input.
+
+Layout, every file gzip-compressed::
+
+    <out>/manifest.json.gz          (or <out>/<user>/manifest.json.gz per user)
+    <out>/figures/<sha256>.json.gz  Plotly figure JSON, shared by all manifests
+
+The manifest maps ``"<date range>|<location>|<day type>|<temperature>"`` to
+the KPIs, per-dimension averages and figure hashes of that combination.
+Identical figures, e.g. of combinations that select the same days, are
+stored once. Rendering runs in a process pool: one task per user when
+there are at least as many users as workers, otherwise each user's
+combinations are split into one slice per worker. A user whose data
+fingerprint and goal match the existing manifest is skipped, so the build
+can run after every data change::
+
+    python -m step_dashboard.snapshot site --source personal_dataset.xlsx
+    python -m step_dashboard.snapshot site --root data
+"""
+import argparse
+import gzip
+import hashlib
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+
+from .calendar_grid import calendar_grid, weeks_in_month
+from .derive import TEMP_LABELS
+from .figures import calendar_figure, day_of_week_figure, location_figure, temperature_figure, timeline_figure
+from .dataset import StepDataset
+from .filters import ALL_LOCATIONS, ALL_TEMPERATURES, DATE_RANGES, DAY_TYPES
+from .ingest import SOURCE_PATH
+from .partitions import PartitionedStore
+from .report import DEFAULT_GOAL, filter_combinations, load_frame, plain, report
+
+MANIFEST = 'manifest.json.gz'
+FIGURE_DIR = 'figures'
+
+
+def combination_key(filters):
+    return '|'.join(filters[:4])
+
+
+def write_gzip(path, payload):
+    """Write ``payload`` compressed, atomically; mtime 0 keeps identical payloads byte-identical."""
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(gzip.compress(payload.encode('utf-8'), mtime=0))
+    os.replace(tmp_path, path)
+
+
+def read_manifest(path):
+    try:
+        with gzip.open(path, 'rt', encoding='utf-8') as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+
+
+class FigureWriter:
+    """Figure files named by their content hash, each built once per key in this process.
+
+    Keys name what a figure is drawn from (e.g. the days of one calendar
+    month), so different filter combinations that draw the same figure
+    reuse it without building it again.
+    """
+
+    def __init__(self, out):
+        self.out = out
+        self.hashes = {}
+
+    def figure(self, key, build):
+        if key not in self.hashes:
+            payload = build().to_json()
+            digest = hashlib.sha256(payload.encode('utf-8')).hexdigest()
+            path = os.path.join(self.out, FIGURE_DIR, f"{digest}.json.gz")
+            if not os.path.exists(path):
+                write_gzip(path, payload)
+            self.hashes[key] = digest
+        return self.hashes[key]
+
+
+def positions_digest(positions):
+    return hashlib.sha256(positions.tobytes()).hexdigest()
+
+
+def render_figures(writer, dataset, filters, goal):
+    """Figure hashes for one combination: the charts, and the calendar for every month of the selection."""
+    positions = dataset.filter_index.positions(*filters)
+    rows = dataset.filter_index.select(*filters)
+    averages = dataset.rollup.averages(*filters)
+    # With only a date filter the trends look back before the selection; with a category filter they do not
+    trend_scope = bool(dataset.filter_index.bitmaps(*filters[1:4]))
+
+    def bars(name, values, build):
+        return writer.figure((name, tuple(values.items())), lambda: build(values, goal)) if len(values) else None
+
+    figures = {
+        'calendar': {},
+        'timeline': writer.figure(
+            ('timeline', positions_digest(positions), trend_scope),
+            lambda: timeline_figure(rows, goal, dataset.trends_for(goal, *filters))
+        ),
+        'day_of_week': bars('day_of_week', averages.day_of_week, day_of_week_figure),
+        'temperature': bars('temperature', averages.temp_bin, temperature_figure),
+        'location': bars('location', averages.location, location_figure),
+    }
+    months = rows['Date'].dt.strftime('%Y-%m').to_numpy()
+    for month in pd.unique(months):
+        year, number = int(month[:4]), int(month[5:])
+        figures['calendar'][month] = writer.figure(
+            ('calendar', month, positions_digest(positions[months == month])),
+            lambda: calendar_figure(calendar_grid(rows, year, number, goal), weeks_in_month(year, number))
+        )
+    return figures
+
+
+# The dataset a worker process last loaded, so its slices of one user load it once
+_loaded = {}
+
+
+def user_dataset(user, root, source, fingerprint=None):
+    """``user``'s dataset, loaded once per process; ``fingerprint`` skips rehashing a known one."""
+    key = (user, root, source)
+    if key not in _loaded:
+        _loaded.clear()
+        store = PartitionedStore(root) if root else None
+        _loaded[key] = StepDataset(*load_frame(user, store=store, source=source), fingerprint=fingerprint)
+    return _loaded[key]
+
+
+def render_entries(dataset, combinations, goal, out):
+    writer = FigureWriter(out)
+    entries = {}
+    for filters in combinations:
+        entry = report(dataset, filters, goal)
+        entry['figures'] = render_figures(writer, dataset, filters, goal) if entry['rows'] else None
+        entries[combination_key(filters)] = entry
+    return entries
+
+
+def manifest_path(out, user):
+    return os.path.join(out, MANIFEST) if user is None else os.path.join(out, user, MANIFEST)
+
+
+def is_current(out, user, fingerprint, goal):
+    manifest = read_manifest(manifest_path(out, user))
+    return manifest is not None and (manifest['fingerprint'], manifest['goal']) == (fingerprint, goal)
+
+
+def write_manifest(out, user, dataset, goal, entries):
+    path = manifest_path(out, user)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    manifest = {
+        'fingerprint': dataset.figure_cache.fingerprint,
+        'goal': goal,
+        'options': {
+            'date_range': [date_range for date_range in DATE_RANGES if date_range != 'Custom Range'],
+            'location': [ALL_LOCATIONS] + dataset.filter_index.locations,
+            'day_type': DAY_TYPES,
+            'temp_range': [ALL_TEMPERATURES] + TEMP_LABELS,
+        },
+        'snapshots': entries,
+    }
+    # Written last, so a reader sees the old manifest until every figure of the new one exists
+    write_gzip(path, json.dumps(manifest, default=plain, ensure_ascii=False))
+
+
+def snapshot_user(task):
+    """Render one user whose manifest is out of date; returns (user, combinations or None when current)."""
+    user, root, source, goal, out, force = task
+    dataset = user_dataset(user, root, source)
+    if not force and is_current(out, user, dataset.figure_cache.fingerprint, goal):
+        return user, None
+    entries = render_entries(dataset, filter_combinations(dataset), goal, out)
+    write_manifest(out, user, dataset, goal, entries)
+    return user, len(entries)
+
+
+def snapshot_slice(task):
+    """Snapshot entries for a slice of one user's combinations; runs in a worker process."""
+    user, root, source, fingerprint, goal, out, combinations = task
+    return render_entries(user_dataset(user, root, source, fingerprint), combinations, goal, out)
+
+
+def run_tasks(function, tasks, workers):
+    if workers == 1:
+        return list(map(function, tasks))
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(function, tasks))
+
+
+def prune_figures(out):
+    """Remove figures no manifest under ``out`` refers to; returns how many were removed."""
+    referenced = set()
+    for directory, _, names in os.walk(out):
+        if MANIFEST in names:
+            for entry in read_manifest(os.path.join(directory, MANIFEST))['snapshots'].values():
+                figures = entry['figures'] or {}
+                referenced.update(figures.get('calendar', {}).values())
+                referenced.update(value for name, value in figures.items() if name != 'calendar' and value)
+    removed = 0
+    figure_dir = os.path.join(out, FIGURE_DIR)
+    for name in os.listdir(figure_dir):
+        if name.endswith('.json.gz') and name[:-len('.json.gz')] not in referenced:
+            os.remove(os.path.join(figure_dir, name))
+            removed += 1
+    return removed
+
+
+def build_snapshots(out, users=(None,), root=None, source=SOURCE_PATH, goal=DEFAULT_GOAL, workers=None, force=False):
+    """Render every stale user's snapshots; returns {user: number of combinations}."""
+    os.makedirs(os.path.join(out, FIGURE_DIR), exist_ok=True)
+    workers = workers or os.cpu_count() or 1
+    if len(users) >= workers:
+        # Each user is loaded once, by the worker that renders it
+        tasks = [(user, root, source, goal, out, force) for user in users]
+        built = {user: count for user, count in run_tasks(snapshot_user, tasks, workers) if count is not None}
+    else:
+        built = {}
+        for user in users:
+            dataset = user_dataset(user, root, source)
+            fingerprint = dataset.figure_cache.fingerprint
+            if not force and is_current(out, user, fingerprint, goal):
+                continue
+            # Contiguous slices: neighbouring combinations often draw the same figures
+            combinations = list(filter_combinations(dataset))
+            size = -(-len(combinations) // workers)
+            tasks = [
+                (user, root, source, fingerprint, goal, out, combinations[start:start + size])
+                for start in range(0, len(combinations), size)
+            ]
+            entries = {}
+            for slice_entries in run_tasks(snapshot_slice, tasks, workers):
+                entries.update(slice_entries)
+            write_manifest(out, user, dataset, goal, entries)
+            built[user] = len(entries)
+    _loaded.clear()
+    if built:
+        prune_figures(out)
+    return built
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Render the dashboard for every fixed filter combination as static files.")
+    parser.add_argument('output', help='directory for the snapshot bundle')
+    parser.add_argument('--root', help='partition root (see step_dashboard.partitions); omit to use --source')
+    parser.add_argument('--users', nargs='*', help='users to render (default: every user under --root)')
+    parser.add_argument('--source', default=SOURCE_PATH, help='single-user data file when --root is not given')
+    parser.add_argument('--goal', type=int, default=DEFAULT_GOAL)
+    parser.add_argument('--workers', type=int, help='worker processes (default: one per core)')
+    parser.add_argument('--force', action='store_true', help='render even when the data has not changed')
+    args = parser.parse_args()
+
+    users = (args.users or PartitionedStore(args.root).users()) if args.root else [None]
+    built = build_snapshots(args.output, users, args.root, args.source, args.goal, args.workers, args.force)
+    if not built:
+        print(f"Snapshots in {args.output} are up to date")
+    for user, combinations in built.items():
+        print(f"Rendered {combinations} combinations{f' for user {user}' if user else ''} to {args.output}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,412 @@
+"""Step records in a local SQLite file, filtered and aggregated in SQL.
+
+The four dashboard filters become one indexed ``WHERE`` clause and the KPI,
+bar-chart and goal what-if aggregates are ``GROUP BY`` queries, so only the
+aggregated values come back to Python. The calendar fetches just the days
+of the month it shows. The timeline still needs every selected day; it is
+fetched as one indexed range query and kept per filter combination.
+Nothing is held in memory beyond what one query returns, so a single
+dashboard process can serve a file of any size. SQLite ships with Python;
+there is no server to run.
+
+Load a workbook (replacing that user's rows) with::
+
+    python -m step_dashboard.sqlstore personal_dataset.xlsx steps.db --user alex
+"""
+import argparse
+import os
+import sqlite3
+import threading
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from .cache import FigureCache, LRUCache
+from .calendar_grid import CLOSE_RATIO
+from .dataset import read_only
+from .derive import DAY_ORDER, TEMP_LABELS, compact_columns, derive_columns
+from .filters import ALL_LOCATIONS, ALL_TEMPERATURES
+from .ingest import read_source
+from .kpis import KpiEngine, assemble_kpis
+from .rollup import DimensionAverages
+from .trends import WINDOWS, RollingTrends
+
+# Frame column -> table column
+COLUMNS = {
+    'Date': 'date',
+    'Day of week': 'day_of_week',
+    'Location': 'location',
+    'Activity': 'activity',
+    'Temperature': 'temperature',
+    'Step Count': 'step_count',
+    'Avg_Temp': 'avg_temp',
+    'Temp_Bin': 'temp_bin',
+    'Day_Type': 'day_type',
+}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS steps (
+    user TEXT NOT NULL,
+    date TEXT NOT NULL,
+    day_of_week TEXT,
+    location TEXT,
+    activity TEXT,
+    temperature TEXT,
+    step_count INTEGER NOT NULL,
+    avg_temp REAL,
+    temp_bin TEXT,
+    day_type TEXT
+);
+CREATE INDEX IF NOT EXISTS steps_date ON steps (user, date, step_count);
+CREATE INDEX IF NOT EXISTS steps_location ON steps (user, location, date);
+CREATE INDEX IF NOT EXISTS steps_day_of_week ON steps (user, day_of_week, date);
+CREATE INDEX IF NOT EXISTS steps_day_type ON steps (user, day_type, date);
+CREATE INDEX IF NOT EXISTS steps_temp_bin ON steps (user, temp_bin, date);
+"""
+
+# Selected frames kept per SqlFilterIndex, one per filter combination
+SELECTIONS_KEPT = 8
+
+# Bar-chart dimension -> table column
+DIMENSION_COLUMNS = {'day_of_week': 'day_of_week', 'location': 'location', 'temp_bin': 'temp_bin'}
+
+
+def day_text(value):
+    return pd.Timestamp(value).strftime('%Y-%m-%d')
+
+
+def where_clause(user, date_range, location, day_type, temp_range, start_date=None, end_date=None):
+    """SQL condition and parameters for one user and a dashboard filter combination."""
+    conditions, params = ['user = ?'], [user]
+    if date_range in ('Last 30 Days', 'Last 60 Days'):
+        days = 30 if date_range == 'Last 30 Days' else 60
+        conditions.append(f"date >= date((SELECT MAX(date) FROM steps WHERE user = ?), '-{days} days')")
+        params.append(user)
+    elif date_range == 'Custom Range':
+        conditions.append('date BETWEEN ? AND ?')
+        params += [day_text(start_date), day_text(end_date)]
+    elif date_range != 'All Days':
+        raise ValueError(f"Unknown date range: {date_range}")
+
+    if location != ALL_LOCATIONS:
+        conditions.append('location = ?')
+        params.append(location)
+    if day_type == 'Weekdays':
+        conditions.append("day_type = 'Weekday'")
+    elif day_type == 'Weekends':
+        conditions.append("day_type = 'Weekend'")
+    elif day_type in DAY_ORDER:
+        conditions.append('day_of_week = ?')
+        params.append(day_type)
+    if temp_range != ALL_TEMPERATURES:
+        conditions.append('temp_bin = ?')
+        params.append(temp_range)
+    return ' AND '.join(conditions), params
+
+
+def write_steps(df, path, user):
+    """Replace ``user``'s rows in the database at ``path`` with the derived frame ``df``."""
+    table = pd.DataFrame({name: df[column] for column, name in COLUMNS.items() if column in df.columns})
+    table['date'] = pd.to_datetime(table['date']).dt.strftime('%Y-%m-%d')
+    table = table.astype(object).where(table.notna(), None)
+    table.insert(0, 'user', user)
+
+    with sqlite3.connect(path) as connection:
+        connection.executescript(SCHEMA)
+        connection.execute('DELETE FROM steps WHERE user = ?', (user,))
+        columns = ', '.join(table.columns)
+        placeholders = ', '.join('?' * len(table.columns))
+        connection.executemany(f'INSERT INTO steps ({columns}) VALUES ({placeholders})', table.itertuples(index=False))
+        connection.execute('ANALYZE')
+    connection.close()
+
+
+class SqlStore:
+    """Read-only queries against a step database, one connection per thread."""
+
+    def __init__(self, path):
+        if not os.path.exists(path):
+            raise FileNotFoundError(path)
+        self.path = path
+        self._local = threading.local()
+
+    def connection(self):
+        connection = getattr(self._local, 'connection', None)
+        if connection is None:
+            connection = self._local.connection = sqlite3.connect(f"file:{self.path}?mode=ro", uri=True)
+        return connection
+
+    def query(self, sql, params=()):
+        return self.connection().execute(sql, params).fetchall()
+
+    def stamp(self):
+        stat = os.stat(self.path)
+        return stat.st_mtime_ns, stat.st_size
+
+    def users(self):
+        return [user for (user,) in self.query('SELECT DISTINCT user FROM steps ORDER BY user')]
+
+    def date_bounds(self, user):
+        first, last = self.query('SELECT MIN(date), MAX(date) FROM steps WHERE user = ?', (user,))[0]
+        if first is None:
+            raise LookupError(f"No data for user {user!r}")
+        return pd.Timestamp(first), pd.Timestamp(last)
+
+    def date_span(self, user, filters):
+        """First and last matching date, or None when nothing matches."""
+        where, params = where_clause(user, *filters)
+        first, last = self.query(f'SELECT MIN(date), MAX(date) FROM steps WHERE {where}', params)[0]
+        return None if first is None else (pd.Timestamp(first), pd.Timestamp(last))
+
+    def locations(self, user):
+        rows = self.query('SELECT DISTINCT location FROM steps WHERE user = ? AND location IS NOT NULL ORDER BY location', (user,))
+        return [location for (location,) in rows]
+
+    def months(self, user, filters):
+        """'YYYY-MM' of every month with a matching record, in order."""
+        where, params = where_clause(user, *filters)
+        return [month for (month,) in self.query(f'SELECT DISTINCT substr(date, 1, 7) FROM steps WHERE {where} ORDER BY 1', params)]
+
+    def rows(self, user, filters, columns=None, between=None):
+        """Matching records in date order as a derived frame, optionally only those ``between`` two dates."""
+        where, params = where_clause(user, *filters)
+        if between is not None:
+            where += ' AND date BETWEEN ? AND ?'
+            params += [day_text(day) for day in between]
+        names = {column: COLUMNS[column] for column in (columns or COLUMNS)}
+        selected = ', '.join(names.values())
+        records = self.query(f'SELECT {selected} FROM steps WHERE {where} ORDER BY date', params)
+        df = pd.DataFrame.from_records(records, columns=list(names), coerce_float=True)
+        df['Date'] = pd.to_datetime(df['Date']).astype('datetime64[us]')
+        if 'Temp_Bin' in df.columns:
+            df['Temp_Bin'] = pd.Categorical(df['Temp_Bin'], categories=TEMP_LABELS, ordered=True)
+        if 'Step Count' in df.columns:
+            df['Step Count'] = df['Step Count'].astype('int64')
+        return compact_columns(df)
+
+    def averages(self, user, filters):
+        """Mean steps per day of week, location and temperature bin, and overall."""
+        where, params = where_clause(user, *filters)
+        tables = {}
+        for name, column in DIMENSION_COLUMNS.items():
+            records = self.query(
+                f'SELECT {column}, SUM(step_count), COUNT(*) FROM steps '
+                f'WHERE {where} AND {column} IS NOT NULL GROUP BY {column} ORDER BY {column}',
+                params,
+            )
+            values = [value for value, _, _ in records]
+            means = np.array([total / count for _, total, count in records], dtype='float64')
+            tables[name] = pd.Series(means, index=pd.Index(values, dtype=object), name='Step Count')
+
+        total, count = self.query(f'SELECT SUM(step_count), COUNT(*) FROM steps WHERE {where}', params)[0]
+        order = {'day_of_week': DAY_ORDER, 'temp_bin': TEMP_LABELS}
+        for name, labels in order.items():
+            tables[name] = tables[name].reindex([label for label in labels if label in tables[name].index])
+        return DimensionAverages(overall=total / count if count else np.nan, **tables)
+
+    def summary(self, user, filters, goal):
+        """Days, goal days, max and min steps, and the longest calendar-day goal streak."""
+        where, params = where_clause(user, *filters)
+        days, goal_days, max_steps, min_steps = self.query(
+            f'SELECT COUNT(*), SUM(step_count >= ?), MAX(step_count), MIN(step_count) FROM steps WHERE {where}',
+            [goal] + params,
+        )[0]
+        # Days that met the goal minus their rank is constant along a run of consecutive days
+        (longest,) = self.query(
+            f"""
+            WITH met AS (
+                SELECT julianday(date) - ROW_NUMBER() OVER (ORDER BY date) AS run
+                FROM steps WHERE {where} AND step_count >= ?
+            )
+            SELECT COALESCE(MAX(length), 0) FROM (SELECT COUNT(*) AS length FROM met GROUP BY run)
+            """,
+            params + [goal],
+        )[0]
+        return days, goal_days or 0, max_steps, min_steps, longest
+
+    def goal_sweep(self, user, filters, goals, close_ratio=CLOSE_RATIO):
+        """whatif.sweep_goals over the matching records, counted and streaked in SQL."""
+        where, params = where_clause(user, *filters)
+        goals = np.asarray(goals, dtype='int64')
+        goal_params = [int(goal) for goal in goals]
+        values = ', '.join(['(?)'] * len(goals))
+        (days,) = self.query(f'SELECT COUNT(*) FROM steps WHERE {where}', params)[0]
+
+        # One sort of the step counts with every threshold merged in: the running
+        # count of days at a threshold's mark is the days at or above it
+        records = self.query(
+            f"""
+            WITH goals(goal) AS (VALUES {values}),
+            marks(value, day, goal, close) AS (
+                SELECT step_count, 1, NULL, 0 FROM steps WHERE {where}
+                UNION ALL SELECT goal, 0, goal, 0 FROM goals
+                UNION ALL SELECT goal * ?, 0, goal, 1 FROM goals
+            )
+            SELECT goal, close, at_or_above FROM (
+                SELECT goal, close, SUM(day) OVER (ORDER BY value DESC, day DESC ROWS UNBOUNDED PRECEDING) AS at_or_above
+                FROM marks
+            ) WHERE goal IS NOT NULL
+            """,
+            goal_params + params + [close_ratio],
+        )
+        at_or_above = {(goal, close): count for goal, close, count in records}
+
+        # Per goal, a run starts on a met day whose previous calendar day is
+        # missing or below the goal and ends where the next one is; its length
+        # is the end's day minus the latest start's
+        streaks = dict(self.query(
+            f"""
+            WITH goals(goal) AS (VALUES {values}),
+            days AS (
+                SELECT day, step_count,
+                    CASE WHEN LAG(day) OVER w = day - 1 THEN LAG(step_count) OVER w ELSE -1 END AS before,
+                    CASE WHEN LEAD(day) OVER w = day + 1 THEN LEAD(step_count) OVER w ELSE -1 END AS after
+                FROM (SELECT julianday(date) AS day, step_count FROM steps WHERE {where})
+                WINDOW w AS (ORDER BY day)
+            )
+            SELECT goal, MAX(length) FROM (
+                SELECT goal, after < goal AS finish,
+                    day - MAX(CASE WHEN before < goal THEN day END) OVER (PARTITION BY goal ORDER BY day) + 1 AS length
+                FROM days CROSS JOIN goals WHERE goal <= step_count AND (before < goal OR after < goal)
+            ) WHERE finish GROUP BY goal
+            """,
+            goal_params + params,
+        ))
+
+        met = np.array([at_or_above[goal, 0] for goal in goal_params], dtype='int64')
+        close = np.array([at_or_above[goal, 1] for goal in goal_params], dtype='int64') - met
+        with np.errstate(invalid='ignore', divide='ignore'):
+            goal_pct = met / days * 100
+        return pd.DataFrame({
+            'goal_pct': goal_pct,
+            'longest_streak': np.array([streaks.get(goal, 0) for goal in goal_params], dtype='int64'),
+            'met': met,
+            'close': close,
+            'missed': days - met - close,
+        }, index=pd.Index(goals, name='goal'))
+
+    def temp_issues(self, user):
+        records = self.query('SELECT date, temperature FROM steps WHERE user = ? AND avg_temp IS NULL ORDER BY date', (user,))
+        issues = pd.DataFrame.from_records(records, columns=['Date', 'Temperature'])
+        issues['Date'] = pd.to_datetime(issues['Date'])
+        return issues
+
+
+class SqlFilterIndex:
+    """The FilterIndex calls the dashboard makes, answered by the database."""
+
+    def __init__(self, store, user):
+        self.store = store
+        self.user = user
+        # Full reruns with unchanged filters reuse the fetched rows
+        self._selections = LRUCache(SELECTIONS_KEPT)
+
+    @property
+    def locations(self):
+        return self.store.locations(self.user)
+
+    def select(self, date_range, location, day_type, temp_range, start_date=None, end_date=None):
+        filters = (date_range, location, day_type, temp_range, start_date, end_date)
+        rows = self._selections.get_or_compute(filters, lambda: read_only(self.store.rows(self.user, filters)))
+        # Like FilterIndex.select, a plain frame sharing the kept, read-only rows until it is written
+        return rows.copy(deep=False)
+
+
+class SqlRollup:
+    def __init__(self, store, user):
+        self.store = store
+        self.user = user
+
+    def averages(self, date_range, location, day_type, temp_range, start_date=None, end_date=None):
+        return self.store.averages(self.user, (date_range, location, day_type, temp_range, start_date, end_date))
+
+
+class SqlKpiEngine(KpiEngine):
+    """KpiEngine whose KPIs are aggregated in SQL instead of over selected rows."""
+
+    def compute(self, filters, goal):
+        days, goal_days, max_steps, min_steps, longest = self.rollup.store.summary(self.rollup.user, filters, goal)
+        return assemble_kpis(self.rollup.averages(*filters), goal_days, days, max_steps, min_steps, longest)
+
+
+class SqlDataset:
+    """One user's records in a SqlStore, with the interface of StepDataset.
+
+    There is no in-memory frame (``df`` is None). KPIs, figures, trends,
+    goal sweeps and the last few selections are cached per database stamp;
+    a changed file needs a new SqlDataset, see ``incremental.WatchedFile``.
+    """
+
+    df = None
+
+    def __init__(self, store, user):
+        self.store = store
+        self.user = user
+        self.filter_index = SqlFilterIndex(store, user)
+        self.rollup = SqlRollup(store, user)
+        self.kpi_engine = SqlKpiEngine(self.filter_index, self.rollup)
+        mtime_ns, size = store.stamp()
+        self.figure_cache = FigureCache(f"sqlite-{user}-{mtime_ns:x}-{size:x}")
+        self.temp_issues = store.temp_issues(user)
+        self._trends = LRUCache(64)
+        self._sweeps = LRUCache(64)
+        self.as_of = datetime.now()
+
+    @property
+    def last_date(self):
+        return self.store.date_bounds(self.user)[1]
+
+    def trends_for(self, goal, date_range, location, day_type, temp_range, start_date=None, end_date=None):
+        """Like StepDataset.trends_for; date-only filters read back far enough to fill the first windows."""
+        filters = (date_range, location, day_type, temp_range, start_date, end_date)
+
+        def compute():
+            columns = ['Date', 'Step Count']
+            if (location, day_type, temp_range) != (ALL_LOCATIONS, 'All Days', ALL_TEMPERATURES):
+                rows = self.store.rows(self.user, filters, columns)
+                return RollingTrends(rows['Date'], rows['Step Count'], goal).frame
+            span = self.store.date_span(self.user, filters)
+            if span is None:
+                return RollingTrends([], [], goal).frame
+            first, last = span
+            # The widest window plus the week before it, for the week-over-week delta
+            since = first - pd.Timedelta(days=max(WINDOWS) + 7)
+            rows = self.store.rows(self.user, ('Custom Range', location, day_type, temp_range, since, last), columns)
+            return RollingTrends(rows['Date'], rows['Step Count'], goal).between(first, last)
+
+        return self._trends.get_or_compute((goal,) + filters, compute)
+
+    def calendar_months(self, date_range, location, day_type, temp_range, start_date=None, end_date=None):
+        return self.store.months(self.user, (date_range, location, day_type, temp_range, start_date, end_date))
+
+    def calendar_rows(self, year, month, date_range, location, day_type, temp_range, start_date=None, end_date=None):
+        """Only the matching records of one month."""
+        first = pd.Timestamp(year, month, 1)
+        return self.store.rows(
+            self.user, (date_range, location, day_type, temp_range, start_date, end_date),
+            ['Date', 'Step Count', 'Location', 'Temperature'], between=(first, first + pd.offsets.MonthEnd(0)),
+        )
+
+    def goal_sweep(self, goals, date_range, location, day_type, temp_range, start_date=None, end_date=None):
+        filters = (date_range, location, day_type, temp_range, start_date, end_date)
+        goals = tuple(int(goal) for goal in goals)
+        return self._sweeps.get_or_compute((goals, filters), lambda: self.store.goal_sweep(self.user, filters, goals))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load a step data file into a SQLite step database.")
+    parser.add_argument('source', help='Excel, Parquet or Arrow file with the step records')
+    parser.add_argument('database', help='SQLite database file, created when missing')
+    parser.add_argument('--user', required=True, help='user id the records belong to')
+    args = parser.parse_args()
+
+    df = read_source(args.source)
+    df['Date'] = pd.to_datetime(df['Date'])
+    df, _ = derive_columns(df.sort_values('Date'))
+    write_steps(df, args.database, args.user)
+    print(f"Wrote {len(df)} rows for user {args.user} to {args.database}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,67 @@
+"""Goal streaks found by run-length encoding a boolean "goal met" array.
+
+By default consecutive rows count as consecutive days. In calendar-aware
+mode a run also breaks where the next row is not exactly one day later, so
+a filtered view (e.g. weekends only) cannot join days that are far apart.
+"""
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+ONE_DAY = np.timedelta64(1, 'D')
+
+
+@dataclass(frozen=True)
+class StreakSummary:
+    current: int
+    longest: int
+    runs: pd.DataFrame
+
+
+def streak_runs(dates, met_goal, calendar_aware=False, groups=None):
+    """All runs of met goals as a frame of start, end and length.
+
+    ``dates`` must be sorted within each group. When ``groups`` is given
+    (e.g. one id per user) a run never crosses from one group to the next,
+    and the group of each run is included as a ``group`` column.
+    """
+    dates = np.asarray(dates, dtype='datetime64[ns]')
+    met = np.asarray(met_goal, dtype=bool)
+
+    # joined[i] says whether row i can extend a run that reaches row i - 1
+    joined = np.ones(len(met), dtype=bool)
+    if len(met) > 0:
+        joined[0] = False
+    if calendar_aware:
+        joined[1:] &= (dates[1:] - dates[:-1]) == ONE_DAY
+    if groups is not None:
+        groups = np.asarray(groups)
+        joined[1:] &= groups[1:] == groups[:-1]
+
+    previous_met = np.concatenate(([False], met[:-1]))
+    starts = np.flatnonzero(met & ~(previous_met & joined))
+
+    next_met = np.concatenate((met[1:], [False]))
+    next_joined = np.concatenate((joined[1:], [False]))
+    ends = np.flatnonzero(met & ~(next_met & next_joined))
+
+    runs = pd.DataFrame({
+        'start': dates[starts],
+        'end': dates[ends],
+        'length': ends - starts + 1,
+    })
+    if groups is not None:
+        runs.insert(0, 'group', groups[starts])
+    return runs
+
+
+def summarize_streaks(dates, met_goal, calendar_aware=False):
+    """Current streak, longest streak and every run for one walker's days."""
+    runs = streak_runs(dates, met_goal, calendar_aware)
+    met = np.asarray(met_goal, dtype=bool)
+
+    longest = int(runs['length'].max()) if len(runs) else 0
+    # The current streak is the run that reaches the last row, if any
+    current = int(runs['length'].iloc[-1]) if len(met) and met[-1] else 0
+    return StreakSummary(current=current, longest=longest, runs=runs)
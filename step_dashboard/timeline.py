@@ -0,0 +1,96 @@
+"""Traces for the Activity Timeline bubble chart.
+
+Hover labels are rendered by Plotly from ``customdata`` and a
+``hovertemplate``, so no per-point strings are built in Python and the
+figure only carries the location and temperature of each point.
+
+Large selections switch to WebGL (``go.Scattergl``) above
+``WEBGL_THRESHOLD`` points, and above ``MAX_POINTS`` each trace is reduced
+with a min-max downsampler that keeps the highest and lowest day of every
+bucket, so goal-met peaks and missed-goal troughs are never dropped.
+Narrowing the date filter reruns the chart at full resolution once the
+selection fits the budget.
+"""
+import numpy as np
+import plotly.graph_objects as go
+
+WEBGL_THRESHOLD = 5000
+MAX_POINTS = 10000
+
+
+def hover_template(temp_label, status):
+    return (
+        '<b>%{x|%Y-%m-%d}</b><br>'
+        '🚶 Steps: %{y:,}<br>'
+        '📍 Location: %{customdata[0]}<br>'
+        '🌡️ ' + temp_label + ': %{customdata[1]}<br>'
+        + status + '<extra></extra>'
+    )
+
+
+def marker_sizes(avg_temp):
+    """Bubble diameters from 15 to 40 px, growing with the day's average temperature."""
+    sizes = 15 + ((np.asarray(avg_temp, dtype='float64') - 8) / 30) * 25
+    return np.clip(np.nan_to_num(sizes, nan=15), 15, 40)
+
+
+def minmax_downsample(values, max_points):
+    """Positions of the min and max of ``values`` in each of ``max_points // 2`` equal buckets."""
+    values = np.asarray(values)
+    n = len(values)
+    if n <= max_points:
+        return np.arange(n)
+
+    buckets = max(1, max_points // 2)
+    edges = np.linspace(0, n, buckets + 1).astype('int64')
+    bucket_id = np.repeat(np.arange(buckets), np.diff(edges))
+    # Sorting by (bucket, value) keeps each bucket in its own block, so the
+    # block's first and last entries are its minimum and maximum
+    order = np.lexsort((values, bucket_id))
+    keep = np.concatenate([order[edges[:-1]], order[edges[1:] - 1]])
+    return np.unique(keep)
+
+
+def timeline_trace(df, name, color, temp_label, status, webgl=False):
+    scatter = go.Scattergl if webgl else go.Scatter
+    return scatter(
+        x=df['Date'],
+        y=df['Step Count'],
+        mode='markers',
+        name=name,
+        marker=dict(
+            size=marker_sizes(df['Avg_Temp']),
+            color=color,
+            line=dict(width=2, color='white'),
+            opacity=0.8,
+            sizemode='diameter'
+        ),
+        customdata=np.column_stack([df['Location'].to_numpy(dtype=object), df['Temperature'].to_numpy(dtype=object)]),
+        hovertemplate=hover_template(temp_label, status),
+        showlegend=True
+    )
+
+
+def timeline_traces(df, goal, met_color, missed_color, webgl_threshold=WEBGL_THRESHOLD, max_points=MAX_POINTS):
+    """The goal-met and goal-missed traces, skipping whichever is empty.
+
+    Returns the traces and the number of points they plot, which is below
+    ``len(df)`` when the selection was downsampled.
+    """
+    met = (df['Step Count'] >= goal).to_numpy()
+    webgl = len(df) > webgl_threshold
+    traces = []
+    shown = 0
+    for mask, name, color, temp_label, status in [
+        (met, 'Goal Met (≥11k)', met_color, 'Temperature', '✅ Goal Met'),
+        (~met, 'Goal Missed (<11k)', missed_color, 'Temp', '❌ Missed Goal'),
+    ]:
+        if not mask.any():
+            continue
+        part = df[mask]
+        # Each trace gets a share of the budget proportional to its size
+        budget = max(2, int(max_points * len(part) / len(df)))
+        part = part.iloc[minmax_downsample(part['Step Count'].to_numpy(), budget)]
+        traces.append(timeline_trace(part, name, color, temp_label, status, webgl))
+        shown += len(part)
+    return traces, shown
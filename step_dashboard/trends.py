@@ -0,0 +1,118 @@
+"""Rolling 7/30/90-day step trends from cumulative sums over calendar days.
+
+Records are binned onto a calendar grid running from the first to the last
+day, so a 30-day window always covers 30 calendar days, however many of
+them have records. The windows average the records they contain and are
+NaN when they contain none. With cumulative sums of steps, records and
+goal hits per day, every window is the difference of two entries, so all
+windows together cost O(days). Appending days extends the sums and
+computes windows only for the new days.
+"""
+import numpy as np
+import pandas as pd
+
+ONE_DAY = np.timedelta64(1, 'D')
+WINDOWS = (7, 30, 90)
+
+
+def daily_bins(offsets, steps, goal, days):
+    """Steps, records and goal hits per day offset, for ``days`` days."""
+    steps = np.asarray(steps, dtype='float64')
+    return (
+        np.bincount(offsets, weights=steps, minlength=days),
+        np.bincount(offsets, minlength=days).astype('float64'),
+        np.bincount(offsets, weights=(steps >= goal).astype('float64'), minlength=days),
+    )
+
+
+def cumulative(values, start=0.0):
+    """Running totals with a leading ``start``, so a window is ``cum[hi] - cum[lo]``."""
+    return np.concatenate(([start], start + np.cumsum(values)))
+
+
+class RollingTrends:
+    """Rolling means, goal rates and week-over-week deltas for one goal.
+
+    ``frame`` has one row per calendar day. Its columns are ``steps`` (the
+    day's mean, NaN without records), ``mean_<w>d`` and ``goal_rate_<w>d``
+    for each window, and ``wow_delta``: the 7-day mean minus the one a
+    week earlier.
+    """
+
+    def __init__(self, dates, steps, goal, windows=WINDOWS):
+        self.goal = goal
+        self.windows = tuple(windows)
+        dates = np.asarray(dates, dtype='datetime64[D]')
+        self.first = dates.min() if len(dates) else None
+        days = int((dates.max() - self.first) // ONE_DAY) + 1 if len(dates) else 0
+        offsets = ((dates - self.first) // ONE_DAY).astype('int64') if len(dates) else np.zeros(0, dtype='int64')
+
+        self.bins = daily_bins(offsets, steps, goal, days)
+        self.cums = tuple(cumulative(values) for values in self.bins)
+        self.frame = self._frame(0, days)
+
+    @property
+    def days(self):
+        return len(self.bins[0])
+
+    def _window_sums(self, cum, lo, hi, window):
+        end = np.arange(lo, hi) + 1
+        return cum[end] - cum[np.maximum(end - window, 0)]
+
+    def _frame(self, lo, hi):
+        """Trend rows for day offsets ``lo`` to ``hi - 1``."""
+        cum_steps, cum_records, cum_met = self.cums
+        steps, records, _ = self.bins
+        columns = {}
+        with np.errstate(invalid='ignore', divide='ignore'):
+            columns['steps'] = np.where(records[lo:hi] > 0, steps[lo:hi] / records[lo:hi], np.nan)
+            for window in self.windows:
+                count = self._window_sums(cum_records, lo, hi, window)
+                columns[f'mean_{window}d'] = np.where(count > 0, self._window_sums(cum_steps, lo, hi, window) / count, np.nan)
+                columns[f'goal_rate_{window}d'] = np.where(count > 0, self._window_sums(cum_met, lo, hi, window) / count * 100, np.nan)
+
+            # The week before: the same 7-day window ending 7 days earlier
+            before_lo, before_hi = max(lo - 7, 0), max(hi - 7, 0)
+            previous = np.full(hi - lo, np.nan)
+            if before_hi > before_lo:
+                count = self._window_sums(cum_records, before_lo, before_hi, 7)
+                means = np.where(count > 0, self._window_sums(cum_steps, before_lo, before_hi, 7) / count, np.nan)
+                previous[hi - lo - len(means):] = means
+            current = self._window_sums(cum_steps, lo, hi, 7) / self._window_sums(cum_records, lo, hi, 7)
+            columns['wow_delta'] = current - previous
+
+        days = (self.first + np.arange(lo, hi) * ONE_DAY) if hi > lo else np.array([], dtype='datetime64[D]')
+        index = pd.DatetimeIndex(days.astype('datetime64[us]'), name='Date')
+        return pd.DataFrame(columns, index=index)
+
+    def appended(self, dates, steps):
+        """New trends with records added; only days from the first new date on are recomputed."""
+        dates = np.asarray(dates, dtype='datetime64[D]')
+        if len(dates) == 0:
+            return self
+        if self.first is None:
+            return RollingTrends(dates, steps, self.goal, self.windows)
+        offsets = ((dates - self.first) // ONE_DAY).astype('int64')
+        if offsets.min() < 0:
+            raise ValueError("Appended records must not be dated before the first day")
+
+        lo = min(int(offsets.min()), self.days)
+        days = max(self.days, int(offsets.max()) + 1)
+        added = daily_bins(offsets - lo, steps, self.goal, days - lo)
+
+        trends = RollingTrends.__new__(RollingTrends)
+        trends.goal, trends.windows, trends.first = self.goal, self.windows, self.first
+        # New arrays; the old snapshot keeps its own
+        trends.bins = tuple(
+            np.concatenate([old[:lo], np.concatenate([old[lo:], np.zeros(days - len(old))]) + new])
+            for old, new in zip(self.bins, added)
+        )
+        trends.cums = tuple(
+            np.concatenate([cum[:lo + 1], cumulative(values[lo:], cum[lo])[1:]])
+            for cum, values in zip(self.cums, trends.bins)
+        )
+        trends.frame = pd.concat([self.frame.iloc[:lo], trends._frame(lo, days)])
+        return trends
+
+    def between(self, start=None, end=None):
+        return self.frame.loc[start:end]
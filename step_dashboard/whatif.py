@@ -0,0 +1,75 @@
+"""The goal-dependent KPIs for many candidate goals at once.
+
+Goal-hit rates and the calendar's met/close/missed split only need
+counts of days at or above a threshold. After one sort of the selected
+step counts, the counts for all thresholds come from a single
+``searchsorted``. Longest streaks need the days in order, so the goal test
+is broadcast into a goals x days matrix and every row is run-length
+encoded at once, a block of goals at a time.
+"""
+import numpy as np
+import pandas as pd
+
+from .calendar_grid import CLOSE_RATIO
+from .streaks import ONE_DAY
+
+GOAL_SWEEP = (5000, 20000, 500)
+# Cells of the goals x days matrix handled at once
+BLOCK_CELLS = 1 << 22
+
+
+def candidate_goals(start=GOAL_SWEEP[0], stop=GOAL_SWEEP[1], step=GOAL_SWEEP[2]):
+    """Goals from ``start`` to ``stop`` inclusive."""
+    return np.arange(start, stop + 1, step)
+
+
+def days_at_or_above(sorted_steps, thresholds):
+    return len(sorted_steps) - np.searchsorted(sorted_steps, thresholds, side='left')
+
+
+def longest_streaks(dates, steps, goals):
+    """Longest run of consecutive calendar days meeting each goal, as in the Highest Streak KPI."""
+    dates = np.asarray(dates, dtype='datetime64[ns]')
+    steps = np.asarray(steps)
+    goals = np.asarray(goals)
+    if len(steps) == 0:
+        return np.zeros(len(goals), dtype='int64')
+
+    positions = np.arange(len(steps), dtype='int32')
+    # A run can only continue into a row dated exactly one day after the previous one
+    breaks = np.ones(len(steps), dtype=bool)
+    breaks[1:] = (dates[1:] - dates[:-1]) != ONE_DAY
+    # Where a met row's run starts: the row before a break, else left to earlier rows
+    met_boundary = np.where(breaks, positions - 1, -1).astype('int32')
+
+    longest = np.empty(len(goals), dtype='int64')
+    block = max(1, BLOCK_CELLS // len(steps))
+    for lo in range(0, len(goals), block):
+        missed = steps[None, :] < goals[lo:lo + block, None]
+        # Per row, the position of the last row before the current run (a missed row or a break)
+        boundary = np.where(missed, positions, met_boundary)
+        np.maximum.accumulate(boundary, axis=1, out=boundary)
+        longest[lo:lo + block] = (positions - boundary).max(axis=1)
+    return longest
+
+
+def sweep_goals(dates, steps, goals, close_ratio=CLOSE_RATIO):
+    """One row per goal: % of days reaching it, longest streak, and days per calendar color.
+
+    ``dates`` must be sorted. Days are met (at or above the goal), close
+    (at or above ``close_ratio`` of it) or missed, as in the calendar.
+    """
+    steps = np.asarray(steps, dtype='int64')
+    goals = np.asarray(goals, dtype='int64')
+    sorted_steps = np.sort(steps)
+    met = days_at_or_above(sorted_steps, goals)
+    close = days_at_or_above(sorted_steps, goals * close_ratio) - met
+    with np.errstate(invalid='ignore', divide='ignore'):
+        goal_pct = met / len(steps) * 100
+    return pd.DataFrame({
+        'goal_pct': goal_pct,
+        'longest_streak': longest_streaks(dates, steps, goals),
+        'met': met,
+        'close': close,
+        'missed': len(steps) - met - close,
+    }, index=pd.Index(goals, name='goal'))